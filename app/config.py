@@ -1,4 +1,7 @@
 import os
+from typing import Dict
+from functools import lru_cache
+from arq.connections import RedisSettings
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -13,11 +16,22 @@ class Settings(BaseSettings):
     debug: bool = False
 
     # Task Configuration
-    max_concurrent_tasks: int = 10  # Reduced per replica, but with 3 replicas = 30 total
+    max_concurrent_tasks: int = 64  # Jobs per worker; they mostly await fal.ai, Supabase and OpenAI
+    max_blocking_threads: int = 256  # Threads for blocking DashScope SDK calls (video submits and waits)
     task_timeout: int = 1200  # Increase to 20 minutes to allow proper error handling
+    queue_poll_delay: float = 0.5  # Seconds between queue polls; pickup delay is negligible next to job runtime
+
+    # Provider Rate Limits (per worker process, 0 = unlimited)
+    fal_rpm: int = 0  # fal.ai requests per minute
+    openai_tpm: int = 0  # OpenAI tokens per minute
+    openai_concurrency: int = 8  # OpenAI requests in flight
+    openai_batch_fallback_seconds: int = 300  # Wait for a "batch" priority request before using the standard endpoint
+    fal_concurrency: int = 4  # Scene image -> video chains in flight per revision job
+    fal_webhook_url: str = ""  # Public URL of the API's /fal-webhook; empty = poll fal.ai for results
 
     # External API Keys
     fal_key: str = ""
+    fal_account_keys: Dict[str, str] = {}  # Extra fal.ai keys by account name (JSON); requests pick one via fal_account
     openai_api_key: str = ""
     json2video_api_key: str = ""  # Deprecated - kept for backward compatibility
     dashscope_api_key: str = ""
@@ -25,6 +39,7 @@ class Settings(BaseSettings):
     # FFmpeg Video Processing API Configuration
     ffmpeg_api_base_url: str = "https://fantastic-endurance-production.up.railway.app"
     ffmpeg_api_key: str = ""  # Optional - for future authentication
+    ffmpeg_api_connections: int = 32  # Concurrent requests to the FFmpeg API per process
 
     # Supabase Configuration
     supabase_url: str = ""
@@ -38,12 +53,12 @@ class Settings(BaseSettings):
     # Base44 App Configuration
     base44_app_id: str = ""
 
-# Singleton instance of settings
-_settings: Settings = None
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """Get application settings singleton"""
-    global _settings
-    if _settings is None:
-        _settings = Settings()
-    return _settings
+    return Settings()
+
+@lru_cache(maxsize=1)
+def get_redis_settings() -> RedisSettings:
+    """Get the arq connection settings for the configured Redis URL, shared by the API and the worker"""
+    return RedisSettings.from_dsn(get_settings().redis_url)
@@ -0,0 +1,15 @@
+"""
+JSON (orjson) codec for arq job payloads and results, shared by the API and the worker
+"""
+from typing import Any
+import orjson
+
+
+def serialize_job(obj: Any) -> bytes:
+    """Serialize an arq job or result; values orjson can't encode (e.g. exceptions) are stored as their repr"""
+    return orjson.dumps(obj, default=repr)
+
+
+def deserialize_job(data: bytes) -> Any:
+    """Deserialize an arq job or result"""
+    return orjson.loads(data)
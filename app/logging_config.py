@@ -0,0 +1,55 @@
+"""
+Non-blocking logging setup shared by the worker and the API processes
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FILE_MAX_BYTES = 50_000_000
+LOG_FILE_BACKUP_COUNT = 3
+
+_listener: logging.handlers.QueueListener = None
+
+
+def configure_queue_logging(log_file: str, level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Route all log records through a queue so the event loop never blocks on stream/file writes.
+
+    The root logger gets a single QueueHandler (an in-memory enqueue); a QueueListener thread
+    formats the records and writes them to stdout and a size-rotated log file.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=LOG_FILE_MAX_BYTES,
+        backupCount=LOG_FILE_BACKUP_COUNT,
+        delay=True
+    )
+    file_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+    # Flush queued records on interpreter shutdown
+    atexit.register(_listener.stop)
+    return _listener
@@ -3,24 +3,17 @@ from fastapi.middleware.cors import CORSMiddleware
 import json
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Awaitable, Callable, Optional
 import logging
-import sys
 
 from .models import WebhookData, ExtractedData
 from .models import RevisionWebhookData, ExtractedRevisionData
 from .webhook_handler import WebhookHandler
 from .config import get_settings
+from .logging_config import configure_queue_logging
 
-# Configure comprehensive logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('app.log')
-    ]
-)
+# Configure logging (queued, so request handlers never block on log I/O)
+configure_queue_logging('app.log')
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -43,6 +36,14 @@ app.add_middleware(
 settings = get_settings()
 webhook_handler = WebhookHandler()
 
+async def queue_after_response(queue_task: Callable[[Any], Awaitable[str]], extracted_data: Any) -> None:
+    """Enqueue a webhook's job after its response was sent, recording a failure on the task"""
+    try:
+        await queue_task(extracted_data)
+    except Exception as e:
+        # The caller already has the task ID, so the failure must show up in its status
+        await webhook_handler.mark_task_failed(extracted_data.task_id, f"Failed to queue task: {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize connections on startup"""
@@ -131,9 +132,11 @@ async def handle_webhook(request: Request, background_tasks: BackgroundTasks):
             
             logger.info(f"WEBHOOK: WAN data extracted - Video ID: {extracted_wan_data.video_id}, User: {extracted_wan_data.user_id}")
             
-            # Queue the WAN processing task (non-blocking)
-            logger.info("WEBHOOK: Queuing WAN processing task...")
-            task_id = await webhook_handler.queue_wan_processing_task(extracted_wan_data)
+            # Queue the WAN processing task after responding: the task ID is assigned during extraction
+            # (derived from the idempotency key when there is one, so a retried webhook maps to the same job)
+            logger.info("WEBHOOK: Queuing WAN processing task in the background...")
+            task_id = extracted_wan_data.task_id
+            background_tasks.add_task(queue_after_response, webhook_handler.queue_wan_processing_task, extracted_wan_data)
             
             logger.info(f"WEBHOOK: WAN processed successfully!")
             logger.info(f"WEBHOOK: Task ID: {task_id}")
@@ -163,9 +166,11 @@ async def handle_webhook(request: Request, background_tasks: BackgroundTasks):
             
             logger.info(f"WEBHOOK: Data extracted - Video ID: {extracted_data.video_id}, User: {extracted_data.user_id}")
             
-            # Queue the processing task (non-blocking)
-            logger.info("WEBHOOK: Queuing processing task...")
-            task_id = await webhook_handler.queue_processing_task(extracted_data)
+            # Queue the processing task after responding: the task ID is assigned during extraction
+            # (derived from the idempotency key when there is one, so a retried webhook maps to the same job)
+            logger.info("WEBHOOK: Queuing processing task in the background...")
+            task_id = extracted_data.task_id
+            background_tasks.add_task(queue_after_response, webhook_handler.queue_processing_task, extracted_data)
             
             logger.info(f"WEBHOOK: Processed successfully!")
             logger.info(f"WEBHOOK: Task ID: {task_id}")
@@ -255,6 +260,30 @@ async def handle_revision_webhook(request: Request, background_tasks: Background
         logger.exception("Full traceback:")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/fal-webhook")
+async def handle_fal_webhook(request: Request):
+    """
+    fal.ai completion webhook
+    Only the request ID is used: workers fetch the result from fal.ai with their own credentials,
+    so the unauthenticated payload is never trusted
+    """
+    try:
+        body_data = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON format")
+    
+    request_id = body_data.get("request_id") if isinstance(body_data, dict) else None
+    if not request_id:
+        raise HTTPException(status_code=400, detail="Missing request_id")
+    
+    try:
+        await webhook_handler.announce_fal_completion(request_id)
+    except Exception as e:
+        logger.error(f"FAL_WEBHOOK: Failed to relay completion of {request_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to relay completion")
+    
+    return {"status": "received", "request_id": request_id}
+
 @app.get("/task/{task_id}")
 async def get_task_status(task_id: str):
     """Get the status of a processing task"""
@@ -26,6 +26,8 @@ class ExtractedData(BaseModel):
     webhook_url: str = Field(..., description="Original webhook URL")
     execution_mode: str = Field(..., description="Execution mode (production/development)")
     aspect_ratio: str = Field(default="9:16", description="Aspect ratio for image resizing (e.g., '9:16', '16:9')")
+    fal_account: str = Field(default="", description="Configured fal.ai account to bill this request to (defaults to the worker's FAL_KEY)")
+    priority: str = Field(default="standard", description="Scene generation priority ('standard' or 'batch' for the cheaper OpenAI Batch API)")
     
     # Additional fields for processing
     task_id: Optional[str] = Field(None, description="Generated task ID")
@@ -76,6 +78,7 @@ class ExtractedWanData(BaseModel):
     webhook_url: str = Field(default="", description="Original webhook URL")
     execution_mode: str = Field(..., description="Execution mode (production/development)")
     aspect_ratio: str = Field(default="9:16", description="Aspect ratio for image resizing (e.g., '9:16', '16:9')")
+    fal_account: str = Field(default="", description="Configured fal.ai account to bill this request to (defaults to the worker's FAL_KEY)")
     
     # Additional fields for processing
     task_id: Optional[str] = Field(None, description="Generated task ID")
@@ -102,6 +105,7 @@ class ExtractedRevisionData(BaseModel):
     timestamp: str = Field(..., description="Request timestamp")
     callback_url: str = Field(default="https://base44.app/api/apps/68b4aa46f5d6326ab93c3ed0/functions/n8nVideoCallback", description="URL to callback when processing is complete")
     aspect_ratio: str = Field(default="9:16", description="Aspect ratio for image resizing (e.g., '9:16', '16:9')")
+    fal_account: str = Field(default="", description="Configured fal.ai account to bill this request to (defaults to the worker's FAL_KEY)")
     
     # Additional fields for processing
     task_id: Optional[str] = Field(None, description="Generated task ID")
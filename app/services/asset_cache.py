@@ -0,0 +1,95 @@
+import hashlib
+import logging
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from .fal_api_client import is_fal_hosted, stage_image_on_fal
+from .single_asset_generation import generate_single_scene_image_with_fal
+from .task_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Generated assets are reused for 30 days
+ASSET_CACHE_TTL = 30 * 24 * 3600
+
+# Staged copies of uploaded images are reused for a week
+STAGED_IMAGE_TTL = 7 * 24 * 3600
+
+
+def canonicalize_url(url: str) -> str:
+    """Strip the query string and fragment so presigned/rotating URLs of the same object match"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def asset_cache_key(kind: str, *inputs: str) -> str:
+    """Build the Redis key of a generated asset from a hash of its generation inputs"""
+    digest = hashlib.sha256("\n".join(inputs).encode("utf-8")).hexdigest()
+    return f"asset:{kind}:{digest}"
+
+
+async def get_or_generate_scene_image(
+    image_prompt: str,
+    base_image_url: str,
+    aspect_ratio: str = "9:16",
+    staged_image_url: Optional[str] = None
+) -> str:
+    """
+    Generate a scene image, reusing a previous result for identical inputs.
+
+    Revisions often ask for a scene image that was already generated from the same product
+    image, prompt and aspect ratio (e.g. when a change is reverted); those are served from
+    Redis instead of a new fal.ai request. The cache is keyed on the original base image URL;
+    `staged_image_url` (a fal.ai storage copy of it) is only what gets sent to fal.ai.
+    """
+    cache_key = asset_cache_key("scene_image", canonicalize_url(base_image_url), image_prompt, aspect_ratio)
+
+    try:
+        cached_url = await get_redis_client().get(cache_key)
+        if cached_url:
+            logger.info(f"ASSET_CACHE: Reusing cached scene image: {cached_url}")
+            return cached_url
+    except Exception as e:
+        logger.error(f"ASSET_CACHE: Failed to read scene image cache: {e}")
+
+    image_url = await generate_single_scene_image_with_fal(image_prompt, staged_image_url or base_image_url, aspect_ratio)
+
+    if image_url:
+        try:
+            await get_redis_client().setex(cache_key, ASSET_CACHE_TTL, image_url)
+        except Exception as e:
+            logger.error(f"ASSET_CACHE: Failed to store scene image in cache: {e}")
+
+    return image_url
+
+
+async def get_or_stage_base_image(image_url: str) -> str:
+    """
+    Stage a product image on fal.ai storage, reusing an earlier copy of the same image.
+
+    New videos and revisions of a product usually start from the same uploaded image,
+    so its fal.ai copy is looked up in Redis before uploading it again.
+    """
+    if is_fal_hosted(image_url):
+        return image_url
+
+    cache_key = asset_cache_key("staged_image", canonicalize_url(image_url))
+
+    try:
+        cached_url = await get_redis_client().get(cache_key)
+        if cached_url:
+            logger.info(f"ASSET_CACHE: Reusing staged base image: {cached_url}")
+            return cached_url
+    except Exception as e:
+        logger.error(f"ASSET_CACHE: Failed to read staged image cache: {e}")
+
+    staged_url = await stage_image_on_fal(image_url)
+
+    # Staging falls back to the original URL on failure; only real copies are cached
+    if staged_url != image_url:
+        try:
+            await get_redis_client().setex(cache_key, STAGED_IMAGE_TTL, staged_url)
+        except Exception as e:
+            logger.error(f"ASSET_CACHE: Failed to store staged image in cache: {e}")
+
+    return staged_url
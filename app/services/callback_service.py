@@ -7,6 +7,28 @@ from ..config import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Shared HTTP client so callbacks reuse keep-alive connections
+_http_client: httpx.AsyncClient = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the shared callback HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=64, keepalive_expiry=60)
+        )
+    return _http_client
+
+
+async def close_callback_client() -> None:
+    """Close the shared callback HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 async def send_video_callback(
     final_video_url: str,
@@ -69,11 +91,10 @@ async def send_video_callback(
         logger.info(f"CALLBACK: Payload: {payload}")
         
         # Send POST request with JSON payload (no custom headers needed)
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                endpoint_url,
-                json=payload
-            )
+        response = await _get_http_client().post(
+            endpoint_url,
+            json=payload
+        )
         
         # Log response details
         logger.info(f"CALLBACK: Response status: {response.status_code}")
@@ -145,19 +166,18 @@ async def send_error_callback(
         logger.info(f"CALLBACK: Payload: {payload}")
         
         # Send POST request with JSON payload (no custom headers needed)
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                endpoint_url,
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                logger.info("CALLBACK: Error callback sent successfully")
-                return True
-            else:
-                logger.error(f"CALLBACK: Error callback failed with status {response.status_code}")
-                logger.error(f"CALLBACK: Response content: {response.text}")
-                return False
+        response = await _get_http_client().post(
+            endpoint_url,
+            json=payload
+        )
+        
+        if response.status_code == 200:
+            logger.info("CALLBACK: Error callback sent successfully")
+            return True
+        else:
+            logger.error(f"CALLBACK: Error callback failed with status {response.status_code}")
+            logger.error(f"CALLBACK: Response content: {response.text}")
+            return False
                 
     except Exception as e:
         logger.error(f"CALLBACK: Failed to send error callback: {e}")
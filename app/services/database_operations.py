@@ -1,7 +1,8 @@
 import logging
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 from ..supabase_client import get_supabase_client
+from .task_utils import get_cached_music, cache_music, move_cached_music
 
 logger = logging.getLogger(__name__)
 
@@ -31,11 +32,11 @@ async def store_scenes_in_supabase(scenes: List[Dict], video_id: str, user_id: s
                 "scene_clip_url": None,  # Will be updated later when videos are generated
             }
             scene_records.append(scene_record)
-            logger.info(f"DATABASE: Scene {scene_record['scene_number']} - Image prompt: {scene_record['image_prompt'][:50]}...")
+            logger.debug("DATABASE: Scene %s - image prompt len=%d", scene_record['scene_number'], len(scene_record['image_prompt'] or ''))
 
         # Insert all scenes at once
         logger.info(f"DATABASE: Inserting {len(scene_records)} scene records...")
-        result = supabase.table("scenes").insert(scene_records).execute()
+        result = await supabase.table("scenes").insert(scene_records).execute()
 
         expected_count = len(scenes)
         if result.data and len(result.data) == expected_count:
@@ -80,12 +81,13 @@ async def store_wan_scenes_in_supabase(wan_scenes: List[Dict], video_id: str, us
                 "scene_clip_url": None,  # Will be updated later when videos are generated
             }
             scene_records.append(scene_record)
-            logger.info(f"DATABASE: WAN Scene {scene_record['scene_number']} - Nano Banana prompt: {scene_record['image_prompt'][:50]}...")
-            logger.info(f"DATABASE: WAN Scene {scene_record['scene_number']} - Voice: {scene_record['eleven_labs_voice_id']}, Emotion: {scene_record['eleven_labs_emotion']}")
+            logger.debug("DATABASE: WAN Scene %s - image prompt len=%d, voice=%s, emotion=%s",
+                         scene_record['scene_number'], len(scene_record['image_prompt'] or ''),
+                         scene_record['eleven_labs_voice_id'], scene_record['eleven_labs_emotion'])
 
         # Insert all 6 WAN scenes at once
         logger.info(f"DATABASE: Inserting {len(scene_records)} WAN scene records...")
-        result = supabase.table("scenes").insert(scene_records).execute()
+        result = await supabase.table("scenes").insert(scene_records).execute()
 
         if result.data and len(result.data) == 6:
             logger.info(f"DATABASE: Successfully stored {len(result.data)} WAN scenes in database")
@@ -119,7 +121,7 @@ async def store_wan_music_prompt_in_supabase(music_prompt: str, video_id: str, u
             "created_at": datetime.utcnow().isoformat()
         }
         
-        result = supabase.table("music").insert(music_record).execute()
+        result = await supabase.table("music").insert(music_record).execute()
         
         if result.data:
             logger.info(f"DATABASE: WAN music prompt stored successfully with ID: {result.data[0].get('id')}")
@@ -132,144 +134,92 @@ async def store_wan_music_prompt_in_supabase(music_prompt: str, video_id: str, u
         logger.error(f"DATABASE: Failed to store WAN music prompt: {e}")
         logger.exception("Full traceback:")
         return False
-async def update_scenes_with_image_urls(scene_image_urls: List[str], video_id: str, user_id: str) -> bool:
-    """Update the scene rows with their generated image URLs (supports both 5 and 6 scenes)"""
-    try:
-        logger.info(f"DATABASE: Updating {len(scene_image_urls)} scene image URLs for video: {video_id}")
 
-        supabase = get_supabase_client()
 
-        # Get the existing scenes for this video
-        result = supabase.table("scenes").select("id, scene_number").eq("video_id", video_id).eq("user_id",
-                                                                                                 user_id).order(
-            "scene_number").execute()
+async def _update_scene_urls_by_position(urls_by_column: Dict[str, List[str]], video_id: str, user_id: str) -> Optional[int]:
+    """
+    Write urls[i] of every column into the i-th scene (by scene_number) with one bulk RPC
 
-        expected_count = len(scene_image_urls)
-        if not result.data or len(result.data) != expected_count:
-            logger.error(f"DATABASE: Expected {expected_count} scenes, found {len(result.data) if result.data else 0}")
-            return False
+    Empty URLs are skipped. Returns the number of scenes written, or None if the video's
+    scene count doesn't match a URL list or the write failed.
+    """
+    supabase = get_supabase_client()
 
-        # Update each scene with its corresponding image URL
-        for i, scene_record in enumerate(result.data):
-            if i < len(scene_image_urls) and scene_image_urls[i]:
-                scene_id = scene_record["id"]
-                scene_number = scene_record["scene_number"]
-                image_url = scene_image_urls[i]
+    # Get the existing scenes for this video
+    result = await supabase.table("scenes").select("scene_number").eq("video_id", video_id).eq("user_id", user_id).order("scene_number").execute()
 
-                logger.info(f"DATABASE: Updating scene {scene_number} (ID: {scene_id}) with image URL")
+    scene_count = len(result.data) if result.data else 0
+    for column, urls in urls_by_column.items():
+        if not scene_count or len(urls) != scene_count:
+            logger.error(f"DATABASE: Expected {len(urls)} scenes for {column}, found {scene_count}")
+            return None
 
-                update_result = supabase.table("scenes").update({
-                    "image_url": image_url,
-                    "updated_at": datetime.utcnow().isoformat()
-                }).eq("id", scene_id).execute()
+    scene_updates = []
+    for i, scene_record in enumerate(result.data):
+        scene_update = {"scene_number": scene_record["scene_number"]}
+        for column, urls in urls_by_column.items():
+            if urls[i]:
+                scene_update[column] = urls[i]
+            else:
+                logger.warning(f"DATABASE: No {column} available for scene {scene_record['scene_number']}")
+        if len(scene_update) > 1:
+            scene_updates.append(scene_update)
 
-                if update_result.data:
-                    logger.info(f"DATABASE: Scene {scene_number} image URL updated successfully")
-                else:
-                    logger.error(f"DATABASE: Failed to update scene {scene_number} image URL")
+    if scene_updates and not await update_scene_asset_urls(scene_updates, video_id, user_id):
+        return None
+    return len(scene_updates)
 
-        logger.info("DATABASE: All scene image URLs updated successfully")
-        return True
-
-    except Exception as e:
-        logger.error(f"DATABASE: Failed to update scene image URLs: {e}")
-        logger.exception("Full traceback:")
-        return False
 
+async def update_scenes_with_asset_urls(urls_by_column: Dict[str, List[str]], video_id: str, user_id: str) -> bool:
+    """
+    Update several asset URL columns of the scene rows at once
 
-async def update_scenes_with_video_urls(video_urls: List[str], video_id: str, user_id: str) -> bool:
-    """Update the scene rows with their generated video URLs in scene_clip_url column (supports both 5 and 6 scenes)"""
+    `urls_by_column` maps image_url, voiceover_url and/or scene_clip_url to per-scene URL lists.
+    """
     try:
-        logger.info(f"DATABASE: Updating {len(video_urls)} scene video URLs for video: {video_id}")
-
-        supabase = get_supabase_client()
-
-        # Get the existing scenes for this video
-        result = supabase.table("scenes").select("id, scene_number").eq("video_id", video_id).eq("user_id",
-                                                                                                 user_id).order(
-            "scene_number").execute()
+        logger.info(f"DATABASE: Updating scene {', '.join(urls_by_column)} for video: {video_id}")
 
-        expected_count = len(video_urls)
-        if not result.data or len(result.data) != expected_count:
-            logger.error(f"DATABASE: Expected {expected_count} scenes, found {len(result.data) if result.data else 0}")
+        updated_count = await _update_scene_urls_by_position(urls_by_column, video_id, user_id)
+        if updated_count is None:
             return False
 
-        # Update each scene with its corresponding video URL
-        updated_count = 0
-        for i, scene_record in enumerate(result.data):
-            if i < len(video_urls) and video_urls[i]:
-                scene_id = scene_record["id"]
-                scene_number = scene_record["scene_number"]
-                video_url = video_urls[i]
-
-                logger.info(
-                    f"DATABASE: Updating scene {scene_number} (ID: {scene_id}) with video URL in scene_clip_url")
-                logger.info(f"DATABASE: Video URL: {video_url}")
-
-                update_result = supabase.table("scenes").update({
-                    "scene_clip_url": video_url,
-                    "updated_at": datetime.utcnow().isoformat()
-                }).eq("id", scene_id).execute()
-
-                if update_result.data:
-                    logger.info(f"DATABASE: Scene {scene_number} scene_clip_url updated successfully")
-                    updated_count += 1
-                else:
-                    logger.error(f"DATABASE: Failed to update scene {scene_number} scene_clip_url")
-            else:
-                scene_number = scene_record["scene_number"]
-                logger.warning(f"DATABASE: No video URL available for scene {scene_number}")
-
-        logger.info(f"DATABASE: Updated {updated_count} out of {expected_count} scene video URLs in scene_clip_url column")
+        logger.info(f"DATABASE: Updated asset URLs of {updated_count} scenes")
         return updated_count > 0
 
     except Exception as e:
-        logger.error(f"DATABASE: Failed to update scene_clip_url: {e}")
+        logger.error(f"DATABASE: Failed to update scene asset URLs: {e}")
         logger.exception("Full traceback:")
         return False
 
 
-async def update_scenes_with_voiceover_urls(voiceover_urls: List[str], video_id: str, user_id: str) -> bool:
-    """Update the scene rows with their generated voiceover URLs (supports both 5 and 6 scenes)"""
+async def update_scene_asset_urls(scene_updates: List[Dict], video_id: str, user_id: str) -> bool:
+    """
+    Update asset URLs of several scenes in one round-trip via the update_scene_asset_urls RPC
+
+    Each entry needs a scene_number plus any of image_url, voiceover_url and scene_clip_url;
+    columns left out of an entry keep their current value.
+    """
     try:
-        logger.info(f"DATABASE: Updating {len(voiceover_urls)} scene voiceover URLs for video: {video_id}")
+        logger.info(f"DATABASE: Bulk updating asset URLs of {len(scene_updates)} scenes for video: {video_id}")
 
         supabase = get_supabase_client()
 
-        # Get the existing scenes for this video
-        result = supabase.table("scenes").select("id, scene_number").eq("video_id", video_id).eq("user_id",
-                                                                                                 user_id).order(
-            "scene_number").execute()
+        result = await supabase.rpc("update_scene_asset_urls", {
+            "p_video_id": video_id,
+            "p_user_id": user_id,
+            "p_scenes": scene_updates
+        })
 
-        expected_count = len(voiceover_urls)
-        if not result.data or len(result.data) != expected_count:
-            logger.error(f"DATABASE: Expected {expected_count} scenes, found {len(result.data) if result.data else 0}")
+        updated_count = len(result.data) if result.data else 0
+        if updated_count != len(scene_updates):
+            logger.error(f"DATABASE: Expected to update {len(scene_updates)} scenes, updated {updated_count}")
             return False
 
-        # Update each scene with its corresponding voiceover URL
-        for i, scene_record in enumerate(result.data):
-            if i < len(voiceover_urls) and voiceover_urls[i]:
-                scene_id = scene_record["id"]
-                scene_number = scene_record["scene_number"]
-                voiceover_url = voiceover_urls[i]
-
-                logger.info(f"DATABASE: Updating scene {scene_number} (ID: {scene_id}) with voiceover URL")
-
-                update_result = supabase.table("scenes").update({
-                    "voiceover_url": voiceover_url,
-                    "updated_at": datetime.utcnow().isoformat()
-                }).eq("id", scene_id).execute()
-
-                if update_result.data:
-                    logger.info(f"DATABASE: Scene {scene_number} voiceover URL updated successfully")
-                else:
-                    logger.error(f"DATABASE: Failed to update scene {scene_number} voiceover URL")
-
-        logger.info("DATABASE: All scene voiceover URLs updated successfully")
+        logger.info(f"DATABASE: Asset URLs of {updated_count} scenes updated successfully")
         return True
 
     except Exception as e:
-        logger.error(f"DATABASE: Failed to update scene voiceover URLs: {e}")
+        logger.error(f"DATABASE: Failed to bulk update scene asset URLs: {e}")
         logger.exception("Full traceback:")
         return False
 
@@ -282,7 +232,7 @@ async def get_scenes_for_video(video_id: str, user_id: str) -> List[Dict]:
         supabase = get_supabase_client()
 
         # Get all scenes for this video, ordered by scene_number
-        result = supabase.table("scenes").select("*").eq("video_id", video_id).eq("user_id", user_id).order("scene_number").execute()
+        result = await supabase.table("scenes").select("*").eq("video_id", video_id).eq("user_id", user_id).order("scene_number").execute()
 
         if not result.data:
             logger.error(f"DATABASE: No scenes found for video: {video_id}")
@@ -294,8 +244,9 @@ async def get_scenes_for_video(video_id: str, user_id: str) -> List[Dict]:
             logger.warning(f"DATABASE: Expected 5 or 6 scenes, found {len(result.data)} for video: {video_id}")
 
         logger.info(f"DATABASE: Successfully retrieved {len(result.data)} scenes for video: {video_id}")
-        for scene in result.data:
-            logger.info(f"DATABASE: Scene {scene.get('scene_number')}: {scene.get('visual_description', '')[:50]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            for scene in result.data:
+                logger.debug("DATABASE: Scene %s: %.50s...", scene.get('scene_number'), scene.get('visual_description') or '')
 
         return result.data
 
@@ -305,6 +256,25 @@ async def get_scenes_for_video(video_id: str, user_id: str) -> List[Dict]:
         return []
 
 
+def workflow_type_for_scenes(video_id: str, scenes: List[Dict]) -> str:
+    """Classify an already-fetched scene list as regular (5 scenes) or WAN (6 scenes) workflow"""
+    if not scenes:
+        logger.warning(f"DATABASE: No scenes found for video: {video_id}")
+        return "regular"  # Default to regular
+    
+    scene_count = len(scenes)
+    
+    if scene_count == 6:
+        logger.info(f"DATABASE: Video {video_id} detected as WAN workflow (6 scenes)")
+        return "wan"
+    elif scene_count == 5:
+        logger.info(f"DATABASE: Video {video_id} detected as regular workflow (5 scenes)")
+        return "regular"
+    else:
+        logger.warning(f"DATABASE: Video {video_id} has unexpected scene count: {scene_count}, defaulting to regular")
+        return "regular"
+
+
 async def detect_video_workflow_type(video_id: str, user_id: str) -> str:
     """Detect if a video uses regular (5 scenes) or WAN (6 scenes) workflow"""
     try:
@@ -313,36 +283,28 @@ async def detect_video_workflow_type(video_id: str, user_id: str) -> str:
         supabase = get_supabase_client()
         
         # Count scenes for this video
-        result = supabase.table("scenes").select("scene_number").eq("video_id", video_id).eq("user_id", user_id).execute()
-        
-        if not result.data:
-            logger.warning(f"DATABASE: No scenes found for video: {video_id}")
-            return "regular"  # Default to regular
-        
-        scene_count = len(result.data)
+        result = await supabase.table("scenes").select("scene_number").eq("video_id", video_id).eq("user_id", user_id).execute()
         
-        if scene_count == 6:
-            logger.info(f"DATABASE: Video {video_id} detected as WAN workflow (6 scenes)")
-            return "wan"
-        elif scene_count == 5:
-            logger.info(f"DATABASE: Video {video_id} detected as regular workflow (5 scenes)")
-            return "regular"
-        else:
-            logger.warning(f"DATABASE: Video {video_id} has unexpected scene count: {scene_count}, defaulting to regular")
-            return "regular"
+        return workflow_type_for_scenes(video_id, result.data)
             
     except Exception as e:
         logger.error(f"DATABASE: Failed to detect workflow type for video {video_id}: {e}")
         return "regular"  # Default to regular on error
+
+
 async def get_music_for_video(video_id: str, user_id: str) -> Dict:
     """Retrieve background music record for a specific video from the database"""
     try:
         logger.info(f"DATABASE: Retrieving music for video: {video_id}, user: {user_id}")
 
+        cached_record = await get_cached_music(video_id, user_id)
+        if cached_record is not None:
+            return cached_record
+
         supabase = get_supabase_client()
 
         # Get music record for this video
-        result = supabase.table("music").select("*").eq("video_id", video_id).eq("user_id", user_id).execute()
+        result = await supabase.table("music").select("*").eq("video_id", video_id).eq("user_id", user_id).execute()
 
         if not result.data:
             logger.warning(f"DATABASE: No music found for video: {video_id}")
@@ -355,6 +317,7 @@ async def get_music_for_video(video_id: str, user_id: str) -> Dict:
         logger.info(f"DATABASE: Successfully retrieved music for video: {video_id}")
         logger.info(f"DATABASE: Music URL: {music_record.get('music_url', '')}")
 
+        await cache_music(video_id, user_id, music_record)
         return music_record
 
     except Exception as e:
@@ -363,56 +326,51 @@ async def get_music_for_video(video_id: str, user_id: str) -> Dict:
         return {}
 
 
-async def update_video_id_for_scenes(old_video_id: str, new_video_id: str, user_id: str) -> bool:
-    """Update video_id for all scenes from old_video_id to new_video_id"""
-    try:
-        logger.info(f"DATABASE: Updating video_id for scenes from {old_video_id} to {new_video_id}")
-
-        supabase = get_supabase_client()
-
-        # Update all scenes with the old video_id to use the new video_id
-        result = supabase.table("scenes").update({
-            "video_id": new_video_id,
-            "updated_at": datetime.utcnow().isoformat()
-        }).eq("video_id", old_video_id).eq("user_id", user_id).execute()
-
-        if result.data:
-            updated_count = len(result.data)
-            logger.info(f"DATABASE: Successfully updated video_id for {updated_count} scenes")
-            return True
-        else:
-            logger.error(f"DATABASE: No scenes updated for video_id change from {old_video_id} to {new_video_id}")
-            return False
-
-    except Exception as e:
-        logger.error(f"DATABASE: Failed to update video_id for scenes: {e}")
-        logger.exception("Full traceback:")
-        return False
-
+async def migrate_video_id(old_video_id: str, new_video_id: str, user_id: str) -> Dict[str, int]:
+    """
+    Move all scenes and the music record from old_video_id to new_video_id in one transaction
 
-async def update_video_id_for_music(old_video_id: str, new_video_id: str, user_id: str) -> bool:
-    """Update video_id for music record from old_video_id to new_video_id"""
+    Returns the affected row counts as {"scenes_updated": n, "music_updated": m} (both 0 on failure).
+    """
+    counts = {"scenes_updated": 0, "music_updated": 0}
     try:
-        logger.info(f"DATABASE: Updating video_id for music from {old_video_id} to {new_video_id}")
+        logger.info(f"DATABASE: Migrating scenes and music from video_id {old_video_id} to {new_video_id}")
 
         supabase = get_supabase_client()
 
-        # Update music record with the old video_id to use the new video_id
-        result = supabase.table("music").update({
-            "video_id": new_video_id,
-        }).eq("video_id", old_video_id).eq("user_id", user_id).execute()
+        # Both UPDATEs run inside the migrate_video_id function, so they commit atomically
+        result = await supabase.rpc("migrate_video_id", {
+            "p_old_video_id": old_video_id,
+            "p_new_video_id": new_video_id,
+            "p_user_id": user_id
+        })
 
         if result.data:
-            logger.info(f"DATABASE: Successfully updated video_id for music record")
-            return True
+            counts["scenes_updated"] = result.data[0].get("scenes_updated") or 0
+            counts["music_updated"] = result.data[0].get("music_updated") or 0
+
+        logger.info(f"DATABASE: Updated video_id for {counts['scenes_updated']} scenes and {counts['music_updated']} music records")
+        if counts["music_updated"]:
+            await move_cached_music(old_video_id, new_video_id, user_id)
         else:
             logger.warning(f"DATABASE: No music record found to update for video_id change from {old_video_id} to {new_video_id}")
-            return False
+        return counts
 
     except Exception as e:
-        logger.error(f"DATABASE: Failed to update video_id for music: {e}")
+        logger.error(f"DATABASE: Failed to migrate video_id: {e}")
         logger.exception("Full traceback:")
-        return False
+        return counts
+
+
+def _scene_update(supabase, update_data: Dict, video_id: str, user_id: str, scene_number: int):
+    """Build an UPDATE of a single scene row, scoped to its video, user and scene number"""
+    return (
+        supabase.table("scenes")
+        .update(update_data)
+        .eq("video_id", video_id)
+        .eq("user_id", user_id)
+        .eq("scene_number", scene_number)
+    )
 
 
 async def update_scenes_with_revised_content(revised_scenes: List[Dict], video_id: str, user_id: str) -> bool:
@@ -433,14 +391,13 @@ async def update_scenes_with_revised_content(revised_scenes: List[Dict], video_i
                 "eleven_labs_emotion": scene.get("eleven_labs_emotion", "neutral"),  # Update emotion
                 "eleven_labs_voice_id": scene.get("eleven_labs_voice_id", "Wise_Woman"),  # Update voice ID
                 "sound_effects": "",  # No longer generated separately
-                "music_direction": scene.get("music_direction", "")[:500],
-                "updated_at": datetime.utcnow().isoformat()
+                "music_direction": scene.get("music_direction", "")[:500]
             }
             
             logger.info(f"DATABASE: Updating scene {scene_number} with revised content...")
             logger.info(f"DATABASE: Scene {scene_number} - Voice: {update_data['eleven_labs_voice_id']}, Emotion: {update_data['eleven_labs_emotion']}")
             
-            result = supabase.table("scenes").update(update_data).eq("video_id", video_id).eq("user_id", user_id).eq("scene_number", scene_number).execute()
+            result = await _scene_update(supabase, update_data, video_id, user_id, scene_number).execute()
             
             if result.data:
                 logger.info(f"DATABASE: Scene {scene_number} updated successfully")
@@ -466,13 +423,12 @@ async def store_music_in_supabase(music_url: str, video_id: str, user_id: str) -
         supabase = get_supabase_client()
 
         # Check if music record already exists for this video
-        existing_result = supabase.table("music").select("*").eq("video_id", video_id).eq("user_id", user_id).execute()
+        existing_result = await supabase.table("music").select("*").eq("video_id", video_id).eq("user_id", user_id).execute()
 
         music_record = {
             "user_id": user_id,
             "video_id": video_id,
-            "music_url": music_url,
-            "updated_at": datetime.utcnow().isoformat()
+            "music_url": music_url
         }
 
         if existing_result.data and len(existing_result.data) > 0:
@@ -485,12 +441,12 @@ async def store_music_in_supabase(music_url: str, video_id: str, user_id: str) -
                 "music_url": music_url
                 # Let database handle updated_at automatically
             }
-            result = supabase.table("music").update(update_record).eq("video_id", video_id).eq("user_id", user_id).execute()
+            result = await supabase.table("music").update(update_record).eq("video_id", video_id).eq("user_id", user_id).execute()
         else:
             # Insert new record
             logger.info("DATABASE: Inserting new music record...")
             music_record["created_at"] = datetime.utcnow().isoformat()
-            result = supabase.table("music").insert(music_record).execute()
+            result = await supabase.table("music").insert(music_record).execute()
 
         if result.data:
             logger.info("DATABASE: Successfully stored music URL in database")
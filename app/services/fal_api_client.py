@@ -0,0 +1,221 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from functools import cached_property
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import fal_client
+import httpx
+from fal_client.client import QUEUE_URL_FORMAT, USER_AGENT, fetch_credentials
+from tenacity import (
+    before_sleep_log, retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+)
+
+from ..config import get_settings
+from .rate_limit import fal_rate_limiter
+from .task_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Keep-alive pool shared by all fal.ai submits, status polls and uploads of the process
+FAL_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=100, max_connections=200)
+
+# Seconds between status checks of a submitted request (fal_client's default is 0.1s)
+FAL_POLL_INTERVAL = 1.0
+
+# With fal.ai webhooks enabled, status is only re-checked this often in case a webhook is lost
+FAL_WEBHOOK_FALLBACK_POLL = 30.0
+
+# Redis channel on which the API relays fal.ai webhook deliveries to the workers
+FAL_COMPLETIONS_CHANNEL = "fal:completed"
+
+# Host of fal.ai's own file storage; images there are already where fal.ai models read them
+FAL_STORAGE_HOST = "fal.media"
+
+# Requests this process is waiting on, by fal.ai request ID
+_completion_waiters: Dict[str, asyncio.Event] = {}
+
+
+class PooledFalClient(fal_client.AsyncClient):
+    """Async fal.ai client whose HTTP session uses an explicitly sized connection pool"""
+
+    @cached_property
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={
+                "Authorization": f"Key {self.key or fetch_credentials()}",
+                "User-Agent": USER_AGENT,
+            },
+            timeout=self.default_timeout,
+            limits=FAL_HTTP_LIMITS
+        )
+
+
+# fal.ai account of the pipeline being run (set per job from its payload); empty means FAL_KEY
+fal_account: ContextVar[str] = ContextVar("fal_account", default="")
+
+# One client per configured fal.ai account, so the cache is bounded by fal_account_keys;
+# each HTTP session is created on first use, inside the worker's event loop
+_fal_clients: Dict[str, PooledFalClient] = {}
+
+# Keep-alive client for downloading images before staging them on fal.ai. Separate from the
+# fal.ai sessions, which send the account key with every request, whatever the host
+_download_client: Optional[httpx.AsyncClient] = None
+
+
+def get_fal_client() -> PooledFalClient:
+    """Return the pooled fal.ai client for the current pipeline's account"""
+    account = fal_account.get()
+    client = _fal_clients.get(account)
+    if client is None:
+        if account and account not in settings.fal_account_keys:
+            raise ValueError(f"Unknown fal.ai account: {account}")
+        key = settings.fal_account_keys[account] if account else settings.fal_key
+        client = _fal_clients[account] = PooledFalClient(key=key or None)
+    return client
+
+
+def _get_download_client() -> httpx.AsyncClient:
+    """Get the shared image download client, creating it on first use"""
+    global _download_client
+    if _download_client is None or _download_client.is_closed:
+        _download_client = httpx.AsyncClient(timeout=60.0, follow_redirects=True, limits=FAL_HTTP_LIMITS)
+    return _download_client
+
+
+async def close_fal_client() -> None:
+    """Close the fal.ai HTTP sessions and the image download client that were opened"""
+    global _download_client
+    for client in _fal_clients.values():
+        if "_client" in client.__dict__:
+            await client._client.aclose()
+    _fal_clients.clear()
+    if _download_client is not None:
+        await _download_client.aclose()
+        _download_client = None
+
+
+def _is_transient_fal_error(error: BaseException) -> bool:
+    """Connection problems, timeouts, 429s and 5xx responses are worth retrying"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+# Retries wrap the rate limiter, so every attempt waits for its own token
+fal_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(multiplier=1, max=20),
+    retry=retry_if_exception(_is_transient_fal_error),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+
+@fal_retry
+async def submit_fal_request(application: str, arguments: Dict[str, Any]) -> fal_client.AsyncRequestHandle:
+    """Submit a fal.ai queue request once the fal rate limiter allows it"""
+    await fal_rate_limiter.acquire()
+    fal = get_fal_client()
+    if not settings.fal_webhook_url:
+        return await fal.submit(application, arguments=arguments)
+
+    # fal_client cannot pass a webhook, so the queue request is made on its session directly
+    response = await fal._client.post(
+        QUEUE_URL_FORMAT + application,
+        json=arguments,
+        params={"fal_webhook": settings.fal_webhook_url}
+    )
+    response.raise_for_status()
+    data = response.json()
+    return fal_client.AsyncRequestHandle(
+        request_id=data["request_id"],
+        response_url=data["response_url"],
+        status_url=data["status_url"],
+        cancel_url=data["cancel_url"],
+        client=fal._client
+    )
+
+
+@fal_retry
+async def get_fal_result(handler: fal_client.AsyncRequestHandle) -> Any:
+    """Wait for a submitted fal.ai request and return its result"""
+    if settings.fal_webhook_url:
+        await _wait_for_webhook(handler)
+    else:
+        async for _ in handler.iter_events(interval=FAL_POLL_INTERVAL):
+            pass
+
+    response = await handler.client.get(handler.response_url)
+    response.raise_for_status()
+    return response.json()
+
+
+@fal_retry
+async def _upload_to_fal(image_url: str) -> str:
+    response = await _get_download_client().get(image_url)
+    response.raise_for_status()
+    content_type = response.headers.get("content-type", "image/jpeg").split(";")[0]
+    return await get_fal_client().upload(response.content, content_type)
+
+
+def is_fal_hosted(url: str) -> bool:
+    """Whether a URL points at fal.ai's own file storage"""
+    host = urlsplit(url).hostname or ""
+    return host == FAL_STORAGE_HOST or host.endswith("." + FAL_STORAGE_HOST)
+
+
+async def stage_image_on_fal(image_url: str) -> str:
+    """
+    Copy an image to fal.ai storage once and return its fal CDN URL.
+
+    Pipelines pass the same product image to every scene request; staging it first means
+    fal.ai fetches it from its own CDN instead of downloading it from the origin each time.
+    Images already on fal.ai storage (e.g. outputs of earlier fal.ai requests) are returned
+    as they are. Falls back to the original URL if staging fails.
+    """
+    if is_fal_hosted(image_url):
+        logger.info("FAL: Base image is already on fal.ai storage, skipping staging")
+        return image_url
+
+    try:
+        staged_url = await _upload_to_fal(image_url)
+        logger.info(f"FAL: Staged base image on fal.ai storage: {staged_url}")
+        return staged_url
+    except Exception as e:
+        logger.warning(f"FAL: Failed to stage base image, using original URL: {e}")
+        return image_url
+
+
+async def _wait_for_webhook(handler: fal_client.AsyncRequestHandle) -> None:
+    """Wait until the webhook of a request is relayed, re-checking its status now and then"""
+    completed = _completion_waiters.setdefault(handler.request_id, asyncio.Event())
+    try:
+        # Registered before the first check, so a webhook that arrives in between is not missed
+        while not isinstance(await handler.status(), fal_client.Completed):
+            try:
+                await asyncio.wait_for(completed.wait(), FAL_WEBHOOK_FALLBACK_POLL)
+            except asyncio.TimeoutError:
+                pass
+            completed.clear()
+    finally:
+        _completion_waiters.pop(handler.request_id, None)
+
+
+async def listen_for_fal_completions() -> None:
+    """Wake up this process's waiting requests when the API relays their fal.ai webhook"""
+    while True:
+        pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(FAL_COMPLETIONS_CHANNEL)
+            async for message in pubsub.listen():
+                completed = _completion_waiters.get(message["data"])
+                if completed:
+                    completed.set()
+        except Exception as e:
+            # Waiting requests fall back to polling until the listener is back
+            logger.error(f"FAL: Completion listener failed, resubscribing: {e}")
+            await asyncio.sleep(5)
+        finally:
+            await pubsub.aclose()
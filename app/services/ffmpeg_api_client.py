@@ -7,6 +7,28 @@ from ..config import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Shared HTTP client so task submissions and status polls reuse keep-alive connections
+_http_client: httpx.AsyncClient = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the shared FFmpeg API HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=settings.ffmpeg_api_connections, keepalive_expiry=60)
+        )
+    return _http_client
+
+
+async def close_ffmpeg_client() -> None:
+    """Close the shared FFmpeg API HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 def normalize_video_url(url: str) -> str:
     """
@@ -83,8 +105,7 @@ async def submit_merge_task(
         url = f"{settings.ffmpeg_api_base_url}/tasks/merge"
         headers = {"Content-Type": "application/json"}
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await _get_http_client().post(url, json=payload, headers=headers)
 
         logger.info(f"FFMPEG_API: Merge task submission response: {response.status_code}")
 
@@ -165,8 +186,7 @@ async def submit_background_music_task(
         url = f"{settings.ffmpeg_api_base_url}/tasks/background-music"
         headers = {"Content-Type": "application/json"}
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await _get_http_client().post(url, json=payload, headers=headers)
 
         logger.info(f"FFMPEG_API: Background music task submission response: {response.status_code}")
 
@@ -240,8 +260,7 @@ async def submit_caption_task(
         url = f"{settings.ffmpeg_api_base_url}/tasks/caption"
         headers = {"Content-Type": "application/json"}
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await _get_http_client().post(url, json=payload, headers=headers)
 
         logger.info(f"FFMPEG_API: Caption task submission response: {response.status_code}")
 
@@ -287,8 +306,7 @@ async def get_task_status(task_id: str) -> Optional[Dict[str, Any]]:
     try:
         url = f"{settings.ffmpeg_api_base_url}/tasks/{task_id}"
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
+        response = await _get_http_client().get(url, timeout=10.0)
 
         if response.status_code != 200:
             logger.error(f"FFMPEG_API: Get task status failed with status {response.status_code}")
@@ -407,8 +425,7 @@ async def download_video_url(video_url: str) -> Optional[str]:
             return None
 
         # Validate URL is accessible
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.head(video_url)
+        response = await _get_http_client().head(video_url, timeout=10.0)
 
         if response.status_code == 200:
             logger.info(f"FFMPEG_API: Video URL validated successfully: {video_url}")
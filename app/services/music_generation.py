@@ -1,7 +1,9 @@
 import asyncio
 import logging
 from typing import List, Dict
-import fal_client
+
+from .fal_api_client import submit_fal_request, get_fal_result
+from .task_utils import cache_music
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +46,7 @@ async def generate_background_music_with_fal(music_prompts: List[str]) -> str:
                 logger.info(f"FAL: Using prompt: {prompt}")
                 
                 # Submit music generation request using Google's Lyria 2
-                handler = await asyncio.to_thread(
-                    fal_client.submit,
+                handler = await submit_fal_request(
                     "fal-ai/lyria2",
                     arguments={
                         "prompt": "fast pace 30 seconds background music for high converting tiktok ad, no vocals, high energy, attention grabbing, first 5 seconds must start with strong hook",
@@ -57,7 +58,7 @@ async def generate_background_music_with_fal(music_prompts: List[str]) -> str:
                 
                 # Add timeout for the result waiting
                 result = await asyncio.wait_for(
-                    asyncio.to_thread(handler.get),
+                    get_fal_result(handler),
                     timeout=900  # 15 minutes timeout for music generation
                 )
                 
@@ -131,8 +132,7 @@ async def generate_wan_background_music_with_fal(music_prompt: str) -> str:
                     logger.info("WAN_MUSIC: Submitting music generation request to Lyria 2...")
                 
                 # Submit music generation request using Google's Lyria 2
-                handler = await asyncio.to_thread(
-                    fal_client.submit,
+                handler = await submit_fal_request(
                     "fal-ai/lyria2",
                     arguments={
                         "prompt": "fast pace 30 seconds background music for high converting tiktok ad, no vocals, high energy, attention grabbing, first 5 seconds must start with strong hook",
@@ -144,7 +144,7 @@ async def generate_wan_background_music_with_fal(music_prompt: str) -> str:
                 
                 # Add timeout for the result waiting
                 result = await asyncio.wait_for(
-                    asyncio.to_thread(handler.get),
+                    get_fal_result(handler),
                     timeout=900  # 15 minutes timeout for music generation
                 )
                 
@@ -201,8 +201,7 @@ async def normalize_music_volume(raw_music_url: str, offset: float = -15.0) -> s
         logger.info(f"FAL: Volume offset: {offset}dB")
         
         # Submit loudnorm request
-        handler = await asyncio.to_thread(
-            fal_client.submit,
+        handler = await submit_fal_request(
             "fal-ai/ffmpeg-api/loudnorm",
             arguments={
                 "audio_url": raw_music_url,
@@ -214,7 +213,7 @@ async def normalize_music_volume(raw_music_url: str, offset: float = -15.0) -> s
         )
         
         logger.info("FAL: Waiting for loudnorm result...")
-        result = await asyncio.to_thread(handler.get)
+        result = await get_fal_result(handler)
         
         # Extract normalized audio URL
         if result and "audio" in result and "url" in result["audio"]:
@@ -245,13 +244,12 @@ async def store_music_in_database(music_url: str, video_id: str, user_id: str) -
         supabase = get_supabase_client()
         
         # Check if music record already exists
-        existing_result = supabase.table("music").select("id").eq("video_id", video_id).eq("user_id", user_id).execute()
+        existing_result = await supabase.table("music").select("id").eq("video_id", video_id).eq("user_id", user_id).execute()
         
         music_record = {
             "user_id": user_id,
             "video_id": video_id,
-            "music_url": music_url,
-            "updated_at": datetime.utcnow().isoformat()
+            "music_url": music_url
         }
         
         if existing_result.data and len(existing_result.data) > 0:
@@ -264,7 +262,7 @@ async def store_music_in_database(music_url: str, video_id: str, user_id: str) -
                 "music_url": music_url
                 # Let database handle updated_at automatically
             }
-            result = supabase.table("music").update(update_record).eq("video_id", video_id).eq("user_id", user_id).execute()
+            result = await supabase.table("music").update(update_record).eq("video_id", video_id).eq("user_id", user_id).execute()
         else:
             # Insert new record
             logger.info("DATABASE: Inserting new music record...")
@@ -276,10 +274,12 @@ async def store_music_in_database(music_url: str, video_id: str, user_id: str) -
                 "created_at": datetime.utcnow().isoformat()
                 # Let database handle updated_at automatically with DEFAULT now()
             }
-            result = supabase.table("music").insert(insert_record).execute()
+            result = await supabase.table("music").insert(insert_record).execute()
         
         if result.data:
             logger.info(f"DATABASE: Music upserted successfully with ID: {result.data[0].get('id')}")
+            # Write through so revisions of this video can skip the music lookup
+            await cache_music(video_id, user_id, result.data[0])
             return True
         else:
             logger.error("DATABASE: Failed to upsert music record")
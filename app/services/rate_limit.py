@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class AsyncLeakyBucket:
+    """
+    Pro-active rate limiter shared by all coroutines in the process.
+
+    The bucket holds up to `capacity` units and refills at `rate` units per second.
+    Callers wait until enough units are available instead of firing requests that
+    the provider would reject with 429 and force into backoff.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._available = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, weight: float = 1.0) -> None:
+        """Wait until `weight` units are available and consume them"""
+        if self.rate <= 0:
+            return
+
+        # A single request larger than the bucket would otherwise wait forever
+        weight = min(weight, self.capacity)
+
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._available < weight:
+                wait_seconds = (weight - self._available) / self.rate
+                logger.info(f"RATE_LIMIT: Waiting {wait_seconds:.2f}s for capacity")
+                await asyncio.sleep(wait_seconds)
+                self._refill()
+            self._available -= weight
+
+
+def per_minute_bucket(limit_per_minute: int) -> AsyncLeakyBucket:
+    """Create a bucket for a per-minute provider limit (0 disables limiting)"""
+    return AsyncLeakyBucket(rate=limit_per_minute / 60.0, capacity=float(limit_per_minute))
+
+
+def estimate_openai_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Rough token estimate for a chat completion (about 4 characters per token)"""
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+# Provider-wide limiters (configured via FAL_RPM and OPENAI_TPM)
+fal_rate_limiter = per_minute_bucket(settings.fal_rpm)
+openai_rate_limiter = per_minute_bucket(settings.openai_tpm)
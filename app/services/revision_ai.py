@@ -3,6 +3,8 @@ import logging
 from typing import List, Dict, Any
 from openai import AsyncOpenAI
 
+from .rate_limit import openai_rate_limiter, estimate_openai_tokens
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,10 +29,13 @@ async def compare_scenes_for_changes(original_scenes: List[Dict], revised_scenes
         original_map = {scene.get("scene_number", i+1): scene for i, scene in enumerate(original_scenes)}
         revised_map = {scene.get("scene_number", i+1): scene for i, scene in enumerate(revised_scenes)}
         
-        # Compare each scene
-        for scene_number in range(1, len(revised_scenes) + 1):
+        total_images_to_regen = 0
+        total_voiceovers_to_regen = 0
+        total_videos_to_regen = 0
+        
+        # Compare each revised scene with the original scene of the same number (single pass)
+        for scene_number, revised_scene in revised_map.items():
             original_scene = original_map.get(scene_number, {})
-            revised_scene = revised_map.get(scene_number, {})
             
             if not original_scene or not revised_scene:
                 logger.warning(f"REVISION_COMPARE: Missing scene {scene_number} in original or revised data")
@@ -91,14 +96,17 @@ async def compare_scenes_for_changes(original_scenes: List[Dict], revised_scenes
             regen_items = []
             if image_needs_regen:
                 regen_items.append("image")
+                total_images_to_regen += 1
             if voiceover_needs_regen:
                 regen_items.append("voiceover")
+                total_voiceovers_to_regen += 1
                 if original_emotion != revised_emotion:
                     logger.info(f"REVISION_COMPARE: Scene {scene_number} emotion changed: {original_emotion} → {revised_emotion}")
                 if original_voice_id != revised_voice_id:
                     logger.info(f"REVISION_COMPARE: Scene {scene_number} voice changed: {original_voice_id} → {revised_voice_id}")
             if video_needs_regen:
                 regen_items.append("video")
+                total_videos_to_regen += 1
             
             if regen_items:
                 logger.info(f"REVISION_COMPARE: Scene {scene_number} needs regeneration: {', '.join(regen_items)}")
@@ -106,10 +114,6 @@ async def compare_scenes_for_changes(original_scenes: List[Dict], revised_scenes
                 logger.info(f"REVISION_COMPARE: Scene {scene_number} unchanged - reusing all assets")
         
         # Summary statistics
-        total_images_to_regen = sum(1 for sc in scene_changes if sc["image_needs_regen"])
-        total_voiceovers_to_regen = sum(1 for sc in scene_changes if sc["voiceover_needs_regen"])
-        total_videos_to_regen = sum(1 for sc in scene_changes if sc["video_needs_regen"])
-        
         logger.info(f"REVISION_COMPARE: Regeneration summary:")
         logger.info(f"REVISION_COMPARE: - Images: {total_images_to_regen}/{len(scene_changes)} scenes")
         logger.info(f"REVISION_COMPARE: - Voiceovers: {total_voiceovers_to_regen}/{len(scene_changes)} scenes")
@@ -305,6 +309,7 @@ INSTRUCTIONS:
         ]
 
         logger.info("WAN_REVISION_AI: Sending WAN revision request to GPT-4...")
+        await openai_rate_limiter.acquire(estimate_openai_tokens(messages, 3000))
         response = await openai_client.chat.completions.create(
             model="gpt-4o",
             messages=messages,
@@ -521,6 +526,7 @@ INSTRUCTIONS:
         ]
 
         logger.info("REVISION_AI: Sending revision request to GPT-4...")
+        await openai_rate_limiter.acquire(estimate_openai_tokens(messages, 2500))
         response = await openai_client.chat.completions.create(
             model="gpt-4o",
             messages=messages,
@@ -1,13 +1,94 @@
+import asyncio
 import json
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Awaitable, Optional
 from openai import AsyncOpenAI
 
-logger = logging.getLogger(__name__)
-
+from ..config import get_settings
+from .rate_limit import openai_rate_limiter, estimate_openai_tokens
 
-async def generate_scenes_with_gpt4(prompt: str, openai_client: AsyncOpenAI) -> List[Dict[str, Any]]:
-    """Generate 5 scenes using GPT-4 with enhanced structured prompt parsing"""
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Seconds between status checks of a scene generation batch
+OPENAI_BATCH_POLL_INTERVAL = 15.0
+
+# Batch states after which the batch will not produce output any more
+OPENAI_BATCH_FINAL_STATES = ("completed", "failed", "expired", "cancelling", "cancelled")
+
+
+async def _in_openai_slot(openai_slots: Optional[asyncio.Semaphore], request: Awaitable[Any]) -> Any:
+    """Await an OpenAI request, holding one of the worker's OpenAI slots while it is in flight if given"""
+    if openai_slots is None:
+        return await request
+    async with openai_slots:
+        return await request
+
+
+async def _create_batched_chat_completion(
+    openai_client: AsyncOpenAI,
+    request: Dict[str, Any],
+    openai_slots: Optional[asyncio.Semaphore] = None
+) -> Optional[str]:
+    """
+    Run a single chat completion through the OpenAI Batch API, which costs half the standard price.
+
+    A slot is only held per API request, never while waiting between status checks.
+    Returns the message content, or None if the batch did not complete within
+    openai_batch_fallback_seconds (the batch is cancelled) or ended without output.
+    """
+    batch_line = json.dumps({
+        "custom_id": "scenes",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": request
+    })
+    input_file = await _in_openai_slot(
+        openai_slots,
+        openai_client.files.create(file=("scenes.jsonl", batch_line.encode()), purpose="batch")
+    )
+    batch = await _in_openai_slot(openai_slots, openai_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    ))
+    logger.info(f"GPT4: Submitted batch {batch.id}, waiting up to {settings.openai_batch_fallback_seconds}s")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.openai_batch_fallback_seconds
+    while batch.status not in OPENAI_BATCH_FINAL_STATES:
+        if loop.time() >= deadline:
+            logger.warning(f"GPT4: Batch {batch.id} still {batch.status}, cancelling it")
+            await _in_openai_slot(openai_slots, openai_client.batches.cancel(batch.id))
+            return None
+        await asyncio.sleep(OPENAI_BATCH_POLL_INTERVAL)
+        batch = await _in_openai_slot(openai_slots, openai_client.batches.retrieve(batch.id))
+
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.error(f"GPT4: Batch {batch.id} ended with status {batch.status}")
+        return None
+
+    output = await _in_openai_slot(openai_slots, openai_client.files.content(batch.output_file_id))
+    response = json.loads(output.text.splitlines()[0])["response"]
+    if response.get("status_code") != 200:
+        logger.error(f"GPT4: Batch {batch.id} request failed with status {response.get('status_code')}")
+        return None
+    return response["body"]["choices"][0]["message"]["content"]
+
+
+async def generate_scenes_with_gpt4(
+    prompt: str,
+    openai_client: AsyncOpenAI,
+    priority: str = "standard",
+    openai_slots: Optional[asyncio.Semaphore] = None
+) -> List[Dict[str, Any]]:
+    """
+    Generate 5 scenes using GPT-4 with enhanced structured prompt parsing
+
+    With priority "batch" the request goes through the Batch API first and falls back
+    to the standard endpoint if the batch is not done in time. If openai_slots is given,
+    a slot is taken around each OpenAI request instead of by the caller for the whole call.
+    """
     try:
         logger.info("GPT4: Starting enhanced scene generation...")
         logger.info(f"GPT4: Prompt length: {len(prompt)} characters")
@@ -90,16 +171,30 @@ OUTPUT STRUCTURE (Simple)
             {"role": "user", "content": prompt}
         ]
 
-        logger.info("GPT4: Sending enhanced request to GPT-4...")
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            max_tokens=4000,  # Increased for more detailed output
-            temperature=0.7
-        )
+        request = {
+            "model": "gpt-4o",
+            "messages": messages,
+            "max_tokens": 4000,  # Increased for more detailed output
+            "temperature": 0.7
+        }
+
+        content = None
+        if priority == "batch":
+            logger.info("GPT4: Sending enhanced request to the GPT-4 Batch API...")
+            try:
+                content = await _create_batched_chat_completion(openai_client, request, openai_slots)
+            except Exception as e:
+                logger.error(f"GPT4: Batch request failed: {e}")
+            if content is None:
+                logger.info("GPT4: Falling back to the standard endpoint")
+
+        if content is None:
+            logger.info("GPT4: Sending enhanced request to GPT-4...")
+            await openai_rate_limiter.acquire(estimate_openai_tokens(messages, 4000))
+            response = await _in_openai_slot(openai_slots, openai_client.chat.completions.create(**request))
+            content = response.choices[0].message.content
 
         logger.info("GPT4: Response received")
-        content = response.choices[0].message.content
 
         if not content:
             logger.error("GPT4: Empty response from GPT-4")
@@ -287,6 +382,7 @@ Your job is to take a structured storyboard text (with 6 scenes, each containing
         ]
 
         logger.info("WAN_GPT4: Sending WAN request to GPT-4...")
+        await openai_rate_limiter.acquire(estimate_openai_tokens(messages, 4000))
         response = await openai_client.chat.completions.create(
             model="gpt-4o",
             messages=messages,
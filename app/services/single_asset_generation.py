@@ -1,7 +1,7 @@
-import asyncio
 import logging
 from typing import Dict
-import fal_client
+
+from .fal_api_client import submit_fal_request, get_fal_result
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +28,7 @@ async def generate_single_voiceover_with_fal(voiceover_prompt: str) -> str:
         logger.info(f"FAL: Extracted text: {voiceover_text[:50]}...")
 
         # Submit voiceover generation request
-        handler = await asyncio.to_thread(
-            fal_client.submit,
+        handler = await submit_fal_request(
             "fal-ai/elevenlabs/tts/turbo-v2.5",
             arguments={
                 "text": voiceover_text,
@@ -41,7 +40,7 @@ async def generate_single_voiceover_with_fal(voiceover_prompt: str) -> str:
         )
 
         logger.info("FAL: Waiting for single voiceover result...")
-        result = await asyncio.to_thread(handler.get)
+        result = await get_fal_result(handler)
 
         # Extract audio URL from the response
         if result and "audio" in result and "url" in result["audio"]:
@@ -68,8 +67,7 @@ async def generate_single_scene_image_with_fal(image_prompt: str, base_image_url
         logger.info(f"FAL: Using aspect ratio: {aspect_ratio}")
 
         # Submit image generation request
-        handler = await asyncio.to_thread(
-            fal_client.submit,
+        handler = await submit_fal_request(
             "fal-ai/gemini-25-flash-image/edit",
             arguments={
                 "prompt": image_prompt,
@@ -81,7 +79,7 @@ async def generate_single_scene_image_with_fal(image_prompt: str, base_image_url
         )
 
         logger.info("FAL: Waiting for single scene image result...")
-        result = await asyncio.to_thread(handler.get)
+        result = await get_fal_result(handler)
 
         # Extract image URL
         if result and "images" in result and len(result["images"]) > 0:
@@ -99,7 +97,7 @@ async def generate_single_scene_image_with_fal(image_prompt: str, base_image_url
         return ""
 
 
-async def generate_single_video_with_fal(image_url: str, visual_description: str) -> str:
+async def generate_single_video_with_fal(image_url: str, visual_description: str, resolution: str = "768P") -> str:
     """Generate a single video from scene image using fal.ai MiniMax Hailuo-02"""
     try:
         logger.info(f"FAL: Starting single video generation...")
@@ -110,20 +108,19 @@ async def generate_single_video_with_fal(image_url: str, visual_description: str
         prompt = visual_description if visual_description else "Create a dynamic product showcase video from this image. Add smooth camera movements and professional lighting effects."
 
         # Submit video generation request
-        handler = await asyncio.to_thread(
-            fal_client.submit,
+        handler = await submit_fal_request(
             "fal-ai/minimax/hailuo-02/standard/image-to-video",
             arguments={
                 "prompt": prompt,
                 "image_url": image_url,
                 "duration": "6",            # 6 seconds
                 "prompt_optimizer": True,   # keep true for better results
-                "resolution": "768P"        # default high resolution
+                "resolution": resolution    # 768P by default, 512P for the main pipeline
             }
         )
 
         logger.info("FAL: Waiting for single video result...")
-        result = await asyncio.to_thread(handler.get)
+        result = await get_fal_result(handler)
 
         if result and "video" in result and "url" in result["video"]:
             video_url = result["video"]["url"]
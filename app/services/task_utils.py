@@ -1,12 +1,35 @@
+import asyncio
+import json
 import logging
 from datetime import datetime
 import redis.asyncio as redis
 from ..config import get_settings
-from typing import Tuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Connections kept on top of one per job, for the fal:completed listener and background cache writes
+REDIS_POOL_HEADROOM = 8
+
+# Shared connection pool for progress updates and step results (one per worker process).
+# When every connection is in use, callers wait for one instead of failing.
+_redis_pool = redis.BlockingConnectionPool.from_url(
+    settings.redis_url,
+    max_connections=settings.max_concurrent_tasks + REDIS_POOL_HEADROOM,
+    timeout=10,
+    decode_responses=True
+)
+
+# Task hashes expire an hour after their last update
+TASK_TTL = 3600
+
+# Completed pipeline step results are kept long enough to survive a job retry
+STEP_RESULT_TTL = 7200
+
+# Music records are cached for an hour; storing new music refreshes the entry
+MUSIC_CACHE_TTL = 3600
+
 
 def get_resolution_from_aspect_ratio(aspect_ratio: str) -> Tuple[int, int]:
     """
@@ -38,19 +61,188 @@ async def update_task_progress(task_id: str, progress: int, status: str):
     try:
         logger.info(f"PROGRESS: Updating task {task_id}: {progress}% - {status}")
 
-        redis_client = redis.Redis.from_url(
-            settings.redis_url,
-            decode_responses=True
-        )
+        await _write_task_progress(task_id, progress, status)
+
+        logger.info("PROGRESS: Task progress updated successfully")
 
-        task_key = f"task:{task_id}"
-        await redis_client.hset(task_key, mapping={
+    except Exception as e:
+        logger.error(f"PROGRESS: Failed to update task progress: {e}")
+
+
+async def _write_task_progress(task_id: str, progress: int, status: str) -> None:
+    """Write progress and refresh the task TTL in a single pipelined round-trip"""
+    task_key = f"task:{task_id}"
+    async with get_redis_client().pipeline(transaction=False) as pipe:
+        pipe.hset(task_key, mapping={
             "progress": progress,
             "status": status,
             "updated_at": datetime.utcnow().isoformat()
         })
+        pipe.expire(task_key, TASK_TTL)
+        await pipe.execute()
+
+
+class ProgressBatcher:
+    """
+    Coalesces progress updates of one task into as few Redis round-trips as possible.
+
+    update() never waits on Redis: writes happen in a background task. An update that
+    moves progress by more than `min_delta` points since the last write is written right
+    away; smaller steps are held for `flush_interval` seconds and collapsed into the latest
+    value. Progress never moves backwards, even when concurrent stages report out of order.
+    Await flush() where the update must be visible before continuing (completion and failure).
+    """
+
+    def __init__(self, task_id: str, flush_interval: float = 2.0, min_delta: int = 5):
+        self.task_id = task_id
+        self.flush_interval = flush_interval
+        self.min_delta = min_delta
+        self._pending: Optional[Tuple[int, str]] = None
+        self._written_progress: Optional[int] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_waiting = False
+
+    async def update(self, progress: int, status: str) -> None:
+        """Record a progress update and schedule its write"""
+        logger.info(f"PROGRESS: Updating task {self.task_id}: {progress}% - {status}")
+        if self._pending is not None:
+            progress = max(progress, self._pending[0])
+        if self._written_progress is not None:
+            progress = max(progress, self._written_progress)
+        self._pending = (progress, status)
+
+        urgent = self._written_progress is None or progress - self._written_progress > self.min_delta
+        if self._flush_task is None:
+            self._schedule_flush(0 if urgent else self.flush_interval)
+        elif urgent and self._flush_waiting:
+            # Skip the rest of the wait; a flush that is already writing picks this up itself
+            self._flush_task.cancel()
+            self._schedule_flush(0)
+
+    def _schedule_flush(self, delay: float) -> None:
+        self._flush_waiting = True
+        self._flush_task = asyncio.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._flush_waiting = False
+        while self._pending is not None:
+            await self._write_pending()
+        self._flush_task = None
+
+    async def _write_pending(self) -> None:
+        progress, status = self._pending
+        self._pending = None
+        try:
+            await _write_task_progress(self.task_id, progress, status)
+            self._written_progress = progress
+        except Exception as e:
+            logger.error(f"PROGRESS: Failed to update task progress: {e}")
+
+    async def flush(self) -> None:
+        """Write the latest pending update and wait until it is stored"""
+        if self._flush_task is not None:
+            if self._flush_waiting:
+                self._flush_task.cancel()
+                self._flush_task = None
+            else:
+                # A background write is in progress and drains whatever is pending
+                await self._flush_task
+
+        if self._pending is not None:
+            await self._write_pending()
+
+
+def get_redis_client() -> redis.Redis:
+    """Get a Redis client for task bookkeeping backed by the shared connection pool"""
+    return redis.Redis(connection_pool=_redis_pool)
+
+
+async def close_task_redis_pool() -> None:
+    """Disconnect the shared task bookkeeping connection pool"""
+    await _redis_pool.disconnect()
 
-        logger.info("PROGRESS: Task progress updated successfully")
 
+async def run_cached_step(
+    task_id: str,
+    step: str,
+    func: Callable[[], Awaitable[Any]],
+    cache_if: Callable[[Any], bool] = bool
+) -> Any:
+    """
+    Run a pipeline step once per task, memoizing its result in Redis.
+
+    When a job is retried, steps that already produced a result are skipped and their
+    stored result is returned instead. Only results accepted by `cache_if` (non-empty by
+    default) are cached, so failed steps run again on the next try.
+
+    Args:
+        task_id: Task identifier shared by all tries of the same job
+        step: Name of the pipeline step
+        func: Zero-argument coroutine function that performs the step
+        cache_if: Predicate deciding whether a result is complete enough to cache
+
+    Returns:
+        The step result (JSON-serializable)
+    """
+    steps_key = f"task:{task_id}:steps"
+
+    try:
+        cached = await get_redis_client().hget(steps_key, step)
+        if cached is not None:
+            logger.info(f"STEP_CACHE: Reusing result of step '{step}' for task {task_id}")
+            return json.loads(cached)
     except Exception as e:
-        logger.error(f"PROGRESS: Failed to update task progress: {e}")
+        logger.error(f"STEP_CACHE: Failed to read step '{step}' for task {task_id}: {e}")
+
+    result = await func()
+
+    if cache_if(result):
+        try:
+            redis_client = get_redis_client()
+            await redis_client.hset(steps_key, step, json.dumps(result))
+            await redis_client.expire(steps_key, STEP_RESULT_TTL)
+        except Exception as e:
+            logger.error(f"STEP_CACHE: Failed to store step '{step}' for task {task_id}: {e}")
+
+    return result
+
+
+def _music_cache_key(video_id: str, user_id: str) -> str:
+    return f"music:{video_id}:{user_id}"
+
+
+async def get_cached_music(video_id: str, user_id: str) -> Optional[Dict]:
+    """Return the cached music record of a video, or None on a miss"""
+    try:
+        cached = await get_redis_client().get(_music_cache_key(video_id, user_id))
+        if cached is not None:
+            logger.info(f"MUSIC_CACHE: Reusing music record for video {video_id}")
+            return json.loads(cached)
+    except Exception as e:
+        logger.error(f"MUSIC_CACHE: Failed to read music record for video {video_id}: {e}")
+    return None
+
+
+async def cache_music(video_id: str, user_id: str, music_record: Dict) -> None:
+    """Store the music record of a video in the cache"""
+    try:
+        await get_redis_client().set(
+            _music_cache_key(video_id, user_id), json.dumps(music_record), ex=MUSIC_CACHE_TTL
+        )
+    except Exception as e:
+        logger.error(f"MUSIC_CACHE: Failed to cache music record for video {video_id}: {e}")
+
+
+async def move_cached_music(old_video_id: str, new_video_id: str, user_id: str) -> None:
+    """Re-key a cached music record after its video_id changed"""
+    music_record = await get_cached_music(old_video_id, user_id)
+    if music_record is None:
+        return
+
+    music_record["video_id"] = new_video_id
+    await cache_music(new_video_id, user_id, music_record)
+    try:
+        await get_redis_client().delete(_music_cache_key(old_video_id, user_id))
+    except Exception as e:
+        logger.error(f"MUSIC_CACHE: Failed to drop music record for video {old_video_id}: {e}")
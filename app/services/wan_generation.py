@@ -1,14 +1,35 @@
 import asyncio
+import functools
 import logging
-from typing import List, Dict
-import fal_client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Dict
 from http import HTTPStatus
 from dashscope import VideoSynthesis
 import dashscope
 from app.config import get_settings
 
+from .fal_api_client import submit_fal_request, get_fal_result
+
 logger = logging.getLogger(__name__)
 
+# The DashScope SDK blocks, and a video wait holds its thread for minutes. These calls get
+# their own pool so they can't exhaust the event loop's default executor, which also
+# resolves hostnames for every async client in the process
+_dashscope_executor = ThreadPoolExecutor(
+    max_workers=get_settings().max_blocking_threads, thread_name_prefix="dashscope"
+)
+
+
+async def run_dashscope_call(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking DashScope SDK call on the dedicated DashScope thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_dashscope_executor, functools.partial(func, *args, **kwargs))
+
+
+def close_dashscope_executor() -> None:
+    """Stop the DashScope thread pool, dropping calls that have not started yet"""
+    _dashscope_executor.shutdown(wait=False, cancel_futures=True)
+
 
 async def generate_wan_scene_images_with_fal(nano_banana_prompts: List[str], base_image_url: str, aspect_ratio: str = "9:16") -> List[str]:
     """Generate scene images using fal.ai Gemini edit model based on nano_banana_prompts and resized base image from frontend"""
@@ -35,8 +56,7 @@ async def generate_wan_scene_images_with_fal(nano_banana_prompts: List[str], bas
                 logger.info(f"WAN: Using aspect ratio: {aspect_ratio}")
 
                 # Submit image generation request using Gemini edit model
-                handler = await asyncio.to_thread(
-                    fal_client.submit,
+                handler = await submit_fal_request(
                     "fal-ai/gemini-25-flash-image/edit",
                     arguments={
                         "prompt": f"{nano_banana_prompt},Authentic UGC style video, shot on smartphone, natural lighting, a bit shaky, no professional camera look. Please generate a still image with a fixed, locked composition (Static Shot), keeping the main subject perfectly centered. The camera must not move. The image must use a full Vertical 9:16 aspect ratio. The technical quality should be ultra-high fidelity, sharp, and hyper-realistic (8K level). Use soft, consistent natural lighting throughout. Crucially, this image must be completely clean—explicitly exclude all digital noise, grain, blurriness, or visual artifacts. Finally, ensure all anatomy is correct (e.g., no distorted hands or faces).",
@@ -66,7 +86,7 @@ async def generate_wan_scene_images_with_fal(nano_banana_prompts: List[str], bas
 
             try:
                 logger.info(f"WAN: Waiting for scene {scene_index + 1} image result...")
-                result = await asyncio.to_thread(handler.get)
+                result = await get_fal_result(handler)
 
                 if result and "images" in result and len(result["images"]) > 0:
                     image_url = result["images"][0]["url"]
@@ -133,15 +153,11 @@ async def generate_wan_voiceovers_with_fal(wan_scenes: List[Dict]) -> List[str]:
         logger.info(f"WAN_VOICEOVER: Starting voiceover generation for {len(wan_scenes)} scenes...")
 
         # Debug: Log all input scenes to see what GPT-4 generated
-        logger.info("WAN_VOICEOVER: === Input Scenes Debug ===")
-        for i, scene in enumerate(wan_scenes):
-            elevenlabs_prompt = scene.get("elevenlabs_prompt", "")
-            emotion = scene.get("eleven_labs_emotion", "")
-            voice_id = scene.get("eleven_labs_voice_id", "")
-            logger.info(f"WAN_VOICEOVER: Scene {i+1} elevenlabs_prompt: '{elevenlabs_prompt}'")
-            logger.info(f"WAN_VOICEOVER: Scene {i+1} emotion: '{emotion}'")
-            logger.info(f"WAN_VOICEOVER: Scene {i+1} voice_id: '{voice_id}'")
-        logger.info("WAN_VOICEOVER: === End Input Scenes Debug ===")
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, scene in enumerate(wan_scenes, 1):
+                logger.debug("WAN_VOICEOVER: Scene %d prompt len=%d, emotion=%s, voice_id=%s",
+                             i, len(scene.get("elevenlabs_prompt") or ''),
+                             scene.get("eleven_labs_emotion", ""), scene.get("eleven_labs_voice_id", ""))
         
         # Initialize results list
         voiceover_urls = [""] * len(wan_scenes)
@@ -153,16 +169,14 @@ async def generate_wan_voiceovers_with_fal(wan_scenes: List[Dict]) -> List[str]:
         for i, scene in enumerate(wan_scenes):
             try:
                 # Extract voiceover data from scene
-                logger.info(f"WAN: === Processing Scene {i+1} ===")
-                logger.info(f"WAN: Full scene data: {scene}")
+                logger.debug("WAN: Processing scene %d", i + 1)
                 
                 elevenlabs_prompt = scene.get("elevenlabs_prompt", "")
                 eleven_labs_emotion = scene.get("eleven_labs_emotion", "neutral")
                 eleven_labs_voice_id = scene.get("eleven_labs_voice_id", "Wise_Woman")
 
-                logger.info(f"WAN_VOICEOVER: Scene {i+1} extracted elevenlabs_prompt: '{elevenlabs_prompt}'")
-                logger.info(f"WAN_VOICEOVER: Scene {i+1} extracted eleven_labs_emotion: '{eleven_labs_emotion}'")
-                logger.info(f"WAN_VOICEOVER: Scene {i+1} extracted eleven_labs_voice_id: '{eleven_labs_voice_id}'")
+                logger.debug("WAN_VOICEOVER: Scene %d voiceover len=%d, emotion=%s, voice_id=%s",
+                             i + 1, len(elevenlabs_prompt or ''), eleven_labs_emotion, eleven_labs_voice_id)
 
                 # Add fallback if prompt is empty
                 if not elevenlabs_prompt or not elevenlabs_prompt.strip():
@@ -172,7 +186,7 @@ async def generate_wan_voiceovers_with_fal(wan_scenes: List[Dict]) -> List[str]:
                 # Use the elevenlabs_prompt as speech text directly
                 voiceover_text = elevenlabs_prompt.strip()
 
-                logger.info(f"WAN_VOICEOVER: Final speech text for scene {i+1}: '{voiceover_text}'")
+                logger.debug("WAN_VOICEOVER: Final speech text len=%d for scene %d", len(voiceover_text), i + 1)
 
                 # At this point voiceover_text should never be empty due to fallback above
                 if not voiceover_text:
@@ -214,8 +228,7 @@ async def generate_wan_voiceovers_with_fal(wan_scenes: List[Dict]) -> List[str]:
                 logger.info(f"WAN_VOICEOVER: Scene {i+1} mapped emotion {eleven_labs_emotion} -> {minimax_emotion}")
 
                 # Submit voiceover generation request using MiniMax Speech 2.5 Turbo with proper voice mapping
-                handler = await asyncio.to_thread(
-                    fal_client.submit,
+                handler = await submit_fal_request(
                     "fal-ai/minimax/preview/speech-2.5-turbo",
                     arguments={
                         "text": voiceover_text,  # Use extracted speech text only
@@ -255,10 +268,9 @@ async def generate_wan_voiceovers_with_fal(wan_scenes: List[Dict]) -> List[str]:
 
             try:
                 logger.info(f"WAN_VOICEOVER: Waiting for scene {scene_index + 1} voiceover result...")
-                result = await asyncio.to_thread(handler.get)
+                result = await get_fal_result(handler)
 
-                # Log the full result to debug the response format
-                logger.info(f"WAN_VOICEOVER: Scene {scene_index + 1} raw API result: {result}")
+                logger.debug("WAN_VOICEOVER: Scene %d raw API result: %s", scene_index + 1, result)
 
                 if result and "audio" in result and "url" in result["audio"]:
                     voiceover_url = result["audio"]["url"]
@@ -358,7 +370,7 @@ async def generate_wan_videos_with_fal(scene_image_urls: List[str], wan2_5_promp
 
                 full_prompt = f"{wan2_5_prompt},Engaging, yet natural movement. Subtle camera shifts like organic pans or gentle pushes. Focus on subject's actions with enhanced, but believable energy. Avoid overly cinematic or overly shaky effects. When animating the clean source image, apply the conversion-optimized UGC Low-Fi aesthetic filter. Set the video to achieve a deliberately unpolished, non-cinematic look. Aggressively add High Grain/Noise and enforce Low Contrast, simulating the texture of heavy H.264 social media compression and features mandatory UGC-style captions on screen"
 
-                rsp = await asyncio.to_thread(
+                rsp = await run_dashscope_call(
                     VideoSynthesis.async_call,
                     api_key=settings.dashscope_api_key,
                     model='wan2.2-i2v-plus',
@@ -393,7 +405,7 @@ async def generate_wan_videos_with_fal(scene_image_urls: List[str], wan2_5_promp
             try:
                 logger.info(f"WAN: Waiting for scene {scene_index + 1} video result (task_id: {task_info['task_id']})...")
 
-                result = await asyncio.to_thread(VideoSynthesis.wait, task_info['response'])
+                result = await run_dashscope_call(VideoSynthesis.wait, task_info['response'])
 
                 if result.status_code == HTTPStatus.OK:
                     video_url = result.output.video_url
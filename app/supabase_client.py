@@ -2,7 +2,9 @@
 Supabase client configuration using direct postgrest client to avoid proxy issues
 """
 import httpx
-from postgrest import SyncPostgrestClient
+from functools import lru_cache
+from postgrest import AsyncPostgrestClient
+from postgrest.utils import AsyncClient
 from .config import get_settings
 import logging
 
@@ -10,6 +12,20 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+# Keep-alive pool shared by all queries (they run concurrently from many jobs)
+SUPABASE_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=40)
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async postgrest client whose HTTP session uses an explicitly sized connection pool"""
+    
+    def create_session(self, base_url, headers, timeout) -> AsyncClient:
+        return AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=SUPABASE_HTTP_LIMITS
+        )
+
 class SupabaseClient:
     """Simple Supabase client wrapper using postgrest directly"""
     
@@ -19,7 +35,7 @@ class SupabaseClient:
         self.rest_url = f"{url}/rest/v1"
         
         # Create postgrest client
-        self.postgrest = SyncPostgrestClient(
+        self.postgrest = PooledPostgrestClient(
             self.rest_url,
             headers={
                 "apikey": self.service_role_key,
@@ -30,11 +46,24 @@ class SupabaseClient:
         )
     
     def table(self, table_name: str):
-        """Get table interface"""
+        """Get table interface (await the built query's execute())"""
         return self.postgrest.table(table_name)
+    
+    async def rpc(self, function_name: str, params: dict):
+        """Call a Postgres function and return its response"""
+        request = await self.postgrest.rpc(function_name, params)
+        return await request.execute()
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections"""
+        await self.postgrest.aclose()
 
+@lru_cache(maxsize=1)
 def get_supabase_client() -> SupabaseClient:
-    """Get Supabase client with service role key for backend operations"""
+    """Get the shared Supabase client with service role key for backend operations
+    
+    The client is created once per process so its HTTP connection pool (keep-alive) is reused.
+    """
     logger.info("SUPABASE: Creating direct postgrest client...")
     
     if not settings.supabase_url or not settings.supabase_service_role_key:
@@ -56,3 +85,10 @@ def get_supabase_client() -> SupabaseClient:
         logger.error(f"SUPABASE: Failed to create client: {e}")
         logger.exception("Full traceback:")
         raise
+
+
+async def close_supabase_client() -> None:
+    """Close the shared Supabase client's connections, if it was ever created"""
+    if get_supabase_client.cache_info().currsize:
+        await get_supabase_client().aclose()
+        get_supabase_client.cache_clear()
@@ -4,28 +4,30 @@ import asyncio
 from datetime import datetime
 from typing import Optional, Dict, Any
 import logging
-import sys
 
 import redis.asyncio as redis
 from arq import create_pool
-from arq.connections import RedisSettings
 
 from .models import WebhookData, ExtractedData, TaskStatus, ProcessingStats
 from .models import RevisionWebhookData, ExtractedRevisionData
 from .models import ExtractedWanData
-from .config import get_settings
+from .config import get_settings, get_redis_settings
+from .logging_config import configure_queue_logging
+from .job_serialization import serialize_job, deserialize_job
+from .services.fal_api_client import FAL_COMPLETIONS_CHANNEL
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('webhook_handler.log')
-    ]
-)
+# Configure logging (queued, so request handlers never block on log I/O)
+configure_queue_logging('webhook_handler.log')
 logger = logging.getLogger(__name__)
 
+
+def task_id_for_request(idempotency_key: Optional[str]) -> str:
+    """Derive the task ID from the request's idempotency key so duplicate webhooks map to the same job"""
+    if not idempotency_key:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"video-request:{idempotency_key}"))
+
+
 class WebhookHandler:
     """Handles webhook processing and task queuing"""
     
@@ -52,7 +54,11 @@ class WebhookHandler:
             
             # Initialize ARQ pool for task queue
             logger.info("REDIS: Creating ARQ pool for task queue...")
-            self.arq_pool = await create_pool(RedisSettings.from_dsn(self.settings.redis_url))
+            self.arq_pool = await create_pool(
+                get_redis_settings(),
+                job_serializer=serialize_job,
+                job_deserializer=deserialize_job
+            )
             logger.info("REDIS: ARQ pool created successfully")
             
             logger.info("REDIS: All connections initialized successfully!")
@@ -89,6 +95,13 @@ class WebhookHandler:
             logger.error(f"REDIS: Connection check failed: {e}")
             return False
     
+    def _is_known_fal_account(self, fal_account: str) -> bool:
+        """Requests may only pick fal.ai accounts configured on the server (empty = default key)"""
+        if fal_account and fal_account not in self.settings.fal_account_keys:
+            logger.error(f"EXTRACT: Unknown fal.ai account: {fal_account}")
+            return False
+        return True
+    
     async def extract_webhook_data(self, webhook_data: WebhookData) -> Optional[ExtractedData]:
         """Extract required fields from webhook data"""
         try:
@@ -114,7 +127,9 @@ class WebhookHandler:
                 "webhook_url": body.get("webhookUrl"),
                 "execution_mode": body.get("executionMode"),
                 "aspect_ratio": body.get("aspect_ratio", "9:16"),
-                "task_id": str(uuid.uuid4())
+                "fal_account": body.get("fal_account"),
+                "priority": body.get("priority", "standard"),
+                "task_id": task_id_for_request(body.get("idempotency_key"))
             }
             
             # Filter out None values for optional fields (keep required fields even if None for Pydantic validation)
@@ -150,6 +165,9 @@ class WebhookHandler:
                 logger.error(f"EXTRACT: Missing required fields: {missing_fields}")
                 return None
             
+            if not self._is_known_fal_account(extracted.fal_account):
+                return None
+            
             logger.info(f"EXTRACT: Successfully extracted data:")
             logger.info(f"EXTRACT: Video ID: {extracted.video_id}")
             logger.info(f"EXTRACT: User: {extracted.user_email}")
@@ -184,6 +202,7 @@ class WebhookHandler:
                 timestamp=body.get("timestamp", ""),
                 callback_url=body.get("callback_url", ""),
                 aspect_ratio=body.get("aspect_ratio", "9:16"),
+                fal_account=body.get("fal_account") or "",
                 task_id=str(uuid.uuid4())
             )
             logger.info(f"EXTRACT: Generated revision task ID: {extracted.task_id}")
@@ -202,6 +221,9 @@ class WebhookHandler:
                 logger.error(f"EXTRACT: Missing required revision fields: {missing_fields}")
                 return None
             
+            if not self._is_known_fal_account(extracted.fal_account):
+                return None
+            
             logger.info(f"EXTRACT: Successfully extracted revision data:")
             logger.info(f"EXTRACT: Video ID: {extracted.video_id}")
             logger.info(f"EXTRACT: Parent Video ID: {extracted.parent_video_id}")
@@ -239,7 +261,8 @@ class WebhookHandler:
                 "webhook_url": body.get("webhookUrl"),
                 "execution_mode": body.get("executionMode"),
                 "aspect_ratio": body.get("aspect_ratio", "9:16"),
-                "task_id": str(uuid.uuid4())
+                "fal_account": body.get("fal_account"),
+                "task_id": task_id_for_request(body.get("idempotency_key"))
             }
             
             # Filter out None values for optional fields (keep required fields even if None for Pydantic validation)
@@ -282,6 +305,9 @@ class WebhookHandler:
                 logger.error(f"EXTRACT: Missing required WAN fields: {missing_fields}")
                 return None
             
+            if not self._is_known_fal_account(extracted.fal_account):
+                return None
+            
             logger.info(f"EXTRACT: Successfully extracted WAN data:")
             logger.info(f"EXTRACT: Video ID: {extracted.video_id}")
             logger.info(f"EXTRACT: User: {extracted.user_email}")
@@ -295,15 +321,29 @@ class WebhookHandler:
             return None
 
     
+    async def _store_task_metadata(self, task_id: str, task_data: Dict[str, Any]) -> None:
+        """
+        Store a task's metadata ahead of its job, keeping any fields the task already has.
+
+        A duplicate webhook maps to the task ID of a job that may already be running or
+        finished, so existing fields (status, progress) are never reset to "queued".
+        """
+        task_key = f"task:{task_id}"
+        logger.info(f"QUEUE: Storing task metadata in Redis: {task_key}")
+        redis_client = redis.Redis(connection_pool=self.redis_pool)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for field, value in task_data.items():
+                pipe.hsetnx(task_key, field, value)
+            pipe.expire(task_key, 3600)  # Expire after 1 hour
+            await pipe.execute()
+        logger.info("QUEUE: Task metadata stored successfully")
+    
     async def queue_processing_task(self, extracted_data: ExtractedData) -> str:
         """Queue a processing task using ARQ"""
         try:
             logger.info(f"QUEUE: Queuing processing task for video: {extracted_data.video_id}")
             
-            # Store task metadata in Redis
-            redis_client = redis.Redis(connection_pool=self.redis_pool)
-            
-            task_key = f"task:{extracted_data.task_id}"
+            # Store task metadata in Redis before the worker can pick the job up
             task_data = {
                 "status": "queued",
                 "created_at": datetime.utcnow().isoformat(),
@@ -313,11 +353,7 @@ class WebhookHandler:
                 "user_id": extracted_data.user_id,
                 "prompt": extracted_data.prompt[:100] + "..." if len(extracted_data.prompt) > 100 else extracted_data.prompt
             }
-            logger.info(f"QUEUE: Storing task metadata in Redis: {task_key}")
-            
-            await redis_client.hset(task_key, mapping=task_data)
-            await redis_client.expire(task_key, 3600)  # Expire after 1 hour
-            logger.info("QUEUE: Task metadata stored successfully")
+            await self._store_task_metadata(extracted_data.task_id, task_data)
             
             # Queue the task for processing
             logger.info("QUEUE: Enqueueing task for ARQ processing...")
@@ -326,7 +362,12 @@ class WebhookHandler:
                 extracted_data.dict(),
                 _job_id=extracted_data.task_id
             )
-            logger.info(f"QUEUE: Task enqueued with job ID: {job.job_id if job else 'None'}")
+            if job is None:
+                # ARQ refuses a second job with the same ID while the first is queued or running,
+                # or for a day after it ended (its result is kept)
+                logger.info(f"QUEUE: Duplicate request, job already queued: {extracted_data.task_id}")
+                return extracted_data.task_id
+            logger.info(f"QUEUE: Task enqueued with job ID: {job.job_id}")
             
             # Update statistics
             await self._update_stats("queued")
@@ -346,10 +387,7 @@ class WebhookHandler:
             logger.info(f"QUEUE: Queuing revision processing task for video: {extracted_data.video_id}")
             logger.info(f"QUEUE: Parent video: {extracted_data.parent_video_id}")
             
-            # Store task metadata in Redis
-            redis_client = redis.Redis(connection_pool=self.redis_pool)
-            
-            task_key = f"task:{extracted_data.task_id}"
+            # Store task metadata in Redis before the worker can pick the job up
             task_data = {
                 "status": "queued",
                 "created_at": datetime.utcnow().isoformat(),
@@ -361,11 +399,7 @@ class WebhookHandler:
                 "revision_request": extracted_data.revision_request[:100] + "..." if len(extracted_data.revision_request) > 100 else extracted_data.revision_request,
                 "type": "revision"
             }
-            logger.info(f"QUEUE: Storing revision task metadata in Redis: {task_key}")
-            
-            await redis_client.hset(task_key, mapping=task_data)
-            await redis_client.expire(task_key, 3600)  # Expire after 1 hour
-            logger.info("QUEUE: Revision task metadata stored successfully")
+            await self._store_task_metadata(extracted_data.task_id, task_data)
             
             # Queue the task for processing
             logger.info("QUEUE: Enqueueing revision task for ARQ processing...")
@@ -374,7 +408,12 @@ class WebhookHandler:
                 extracted_data.dict(),
                 _job_id=extracted_data.task_id
             )
-            logger.info(f"QUEUE: Revision task enqueued with job ID: {job.job_id if job else 'None'}")
+            if job is None:
+                # ARQ refuses a second job with the same ID while the first is queued or running,
+                # or for a day after it ended (its result is kept)
+                logger.info(f"QUEUE: Duplicate revision request, job already queued: {extracted_data.task_id}")
+                return extracted_data.task_id
+            logger.info(f"QUEUE: Revision task enqueued with job ID: {job.job_id}")
             
             # Update statistics
             await self._update_stats("queued")
@@ -393,10 +432,7 @@ class WebhookHandler:
         try:
             logger.info(f"QUEUE: Queuing WAN processing task for video: {extracted_data.video_id}")
             
-            # Store task metadata in Redis
-            redis_client = redis.Redis(connection_pool=self.redis_pool)
-            
-            task_key = f"task:{extracted_data.task_id}"
+            # Store task metadata in Redis before the worker can pick the job up
             task_data = {
                 "status": "queued",
                 "created_at": datetime.utcnow().isoformat(),
@@ -408,11 +444,7 @@ class WebhookHandler:
                 "prompt": extracted_data.prompt[:100] + "..." if len(extracted_data.prompt) > 100 else extracted_data.prompt,
                 "type": "wan"
             }
-            logger.info(f"QUEUE: Storing WAN task metadata in Redis: {task_key}")
-            
-            await redis_client.hset(task_key, mapping=task_data)
-            await redis_client.expire(task_key, 3600)  # Expire after 1 hour
-            logger.info("QUEUE: WAN task metadata stored successfully")
+            await self._store_task_metadata(extracted_data.task_id, task_data)
             
             # Queue the task for processing
             logger.info("QUEUE: Enqueueing WAN task for ARQ processing...")
@@ -421,7 +453,12 @@ class WebhookHandler:
                 extracted_data.dict(),
                 _job_id=extracted_data.task_id
             )
-            logger.info(f"QUEUE: WAN task enqueued with job ID: {job.job_id if job else 'None'}")
+            if job is None:
+                # ARQ refuses a second job with the same ID while the first is queued or running,
+                # or for a day after it ended (its result is kept)
+                logger.info(f"QUEUE: Duplicate WAN request, job already queued: {extracted_data.task_id}")
+                return extracted_data.task_id
+            logger.info(f"QUEUE: WAN task enqueued with job ID: {job.job_id}")
             
             # Update statistics
             await self._update_stats("queued")
@@ -488,6 +525,27 @@ class WebhookHandler:
             logger.error(f"STATS: Failed to get processing stats: {e}")
             return ProcessingStats()
     
+    async def mark_task_failed(self, task_id: str, error: str) -> None:
+        """Record that a task failed before its job ran, so status polling reports it"""
+        try:
+            task_key = f"task:{task_id}"
+            redis_client = redis.Redis(connection_pool=self.redis_pool)
+            await redis_client.hset(task_key, mapping={
+                "status": "failed",
+                "error": error,
+                "updated_at": datetime.utcnow().isoformat()
+            })
+            await redis_client.expire(task_key, 3600)  # Expire after 1 hour
+            logger.info(f"QUEUE: Task {task_id} marked as failed")
+        except Exception as e:
+            logger.error(f"QUEUE: Failed to mark task {task_id} as failed: {e}")
+    
+    async def announce_fal_completion(self, request_id: str) -> None:
+        """Tell the workers that a fal.ai request finished; they fetch its result from fal.ai"""
+        redis_client = redis.Redis(connection_pool=self.redis_pool)
+        receivers = await redis_client.publish(FAL_COMPLETIONS_CHANNEL, request_id)
+        logger.info(f"FAL_WEBHOOK: Completion of {request_id} relayed to {receivers} workers")
+    
     async def _update_stats(self, operation: str):
         """Update processing statistics"""
         try:
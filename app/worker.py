@@ -2,208 +2,438 @@
 """
 ARQ Worker for processing video generation tasks
 """
-import os
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Awaitable, Callable, Optional, Set, Type
 import fal_client
 from openai import AsyncOpenAI
+from pydantic import BaseModel, ValidationError
 import redis.asyncio as redis
-from arq import create_pool
-from arq.connections import RedisSettings
+from arq import Retry, create_pool
 
-from .config import get_settings
+from .config import get_settings, get_redis_settings
+from .logging_config import configure_queue_logging
+from .job_serialization import serialize_job, deserialize_job
 from .models import ExtractedData, ExtractedRevisionData, ExtractedWanData
-from .supabase_client import get_supabase_client
+from .supabase_client import close_supabase_client
 
 # Import all service modules
 from .services.scene_generation import generate_scenes_with_gpt4, wan_scene_generator
-from .services.image_processing import generate_scene_images_with_fal
-from .services.audio_generation import generate_voiceovers_with_fal
-from .services.video_generation import generate_videos_with_fal
+from .services.single_asset_generation import (
+    generate_single_scene_image_with_fal, generate_single_voiceover_with_fal, generate_single_video_with_fal
+)
+from .services.asset_cache import get_or_generate_scene_image, get_or_stage_base_image
+from .services.ffmpeg_api_client import close_ffmpeg_client
+from .services.fal_api_client import close_fal_client, fal_account, listen_for_fal_completions
 from .services.music_generation import generate_background_music_with_fal, normalize_music_volume, store_music_in_database
 from .services.final_composition import compose_final_video_with_audio, compose_wan_final_video_with_audio
 from .services.caption_generation import add_captions_to_video
-from .services.callback_service import send_video_callback, send_error_callback
+from .services.callback_service import send_video_callback, send_error_callback, close_callback_client
 from .services.revision_ai import compare_scenes_for_changes
 from .services.database_operations import (
     store_scenes_in_supabase, store_wan_scenes_in_supabase,
-    update_scenes_with_image_urls, update_scenes_with_video_urls, update_scenes_with_voiceover_urls,
-    get_scenes_for_video, get_music_for_video, detect_video_workflow_type,
-    update_video_id_for_scenes, update_video_id_for_music, update_scenes_with_revised_content
+    get_scenes_for_video, get_music_for_video, workflow_type_for_scenes,
+    migrate_video_id, update_scenes_with_revised_content,
+    update_scene_asset_urls, update_scenes_with_asset_urls
 )
 from .services.revision_ai import generate_revised_scenes_with_gpt4, generate_revised_wan_scenes_with_gpt4
-from .services.task_utils import update_task_progress
-from .services.wan_generation import generate_wan_scene_images_with_fal, generate_wan_voiceovers_with_fal, generate_wan_videos_with_fal
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from .services.task_utils import ProgressBatcher, run_cached_step, close_task_redis_pool
+from .services.wan_generation import (
+    generate_wan_scene_images_with_fal, generate_wan_voiceovers_with_fal, generate_wan_videos_with_fal,
+    close_dashscope_executor
 )
+
+# Configure logging (queued, so pipeline coroutines never block on log I/O)
+configure_queue_logging('worker.log')
 logger = logging.getLogger(__name__)
 
 # Get settings
 settings = get_settings()
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
+# Delay before a failed job is retried
+RETRY_DELAY_SECONDS = 30
 
-# Configure fal client
+# Extra attempts for a scene asset that came back empty before that scene counts as failed
+SCENE_ASSET_RETRIES = 1
+
+# fal.ai requests use the key of the job's configured account, falling back to FAL_KEY
 if settings.fal_key:
-    os.environ["FAL_KEY"] = settings.fal_key
-    logger.info("WORKER: fal.ai client configured")
+    logger.info("WORKER: fal.ai default key configured")
 else:
-    logger.warning("WORKER: FAL_KEY not found - fal.ai operations will fail")
+    logger.warning("WORKER: FAL_KEY not found - fal.ai operations without a configured account will fail")
+
+
+class PipelineStepFailed(Exception):
+    """Raised when a pipeline step failed and the failure has already been reported"""
+
+
+# Error callbacks still being sent; referenced here so they are not garbage collected
+# before they finish, and drained on shutdown
+_pending_error_callbacks: Set[asyncio.Task] = set()
+
+
+async def _send_error_callback_logged(*args: Any, **kwargs: Any) -> None:
+    try:
+        await send_error_callback(*args, **kwargs)
+    except Exception as callback_error:
+        logger.error(f"PIPELINE: Failed to send error callback: {callback_error}")
+
+
+async def report_pipeline_failure(
+    ctx: Dict[str, Any],
+    extracted_data: Any,
+    error_msg: str,
+    is_revision: bool = False,
+    retryable: bool = False
+) -> None:
+    """Schedule a job retry if allowed, otherwise start sending the error callback for a failed pipeline"""
+    job_try = ctx.get("job_try", 1)
+    if retryable and job_try < WorkerSettings.max_tries:
+        logger.info(f"PIPELINE: Retrying in {RETRY_DELAY_SECONDS}s (attempt {job_try} of {WorkerSettings.max_tries})")
+        raise Retry(defer=RETRY_DELAY_SECONDS)
+
+    # Send the callback in the background so the failed job frees its slot right away
+    callback_task = asyncio.create_task(_send_error_callback_logged(
+        error_msg,
+        extracted_data.video_id,
+        extracted_data.chat_id,
+        extracted_data.user_id,
+        extracted_data.callback_url,
+        is_revision=is_revision
+    ))
+    _pending_error_callbacks.add(callback_task)
+    callback_task.add_done_callback(_pending_error_callbacks.discard)
+
+
+@asynccontextmanager
+async def pipeline_step(
+    ctx: Dict[str, Any],
+    extracted_data: Any,
+    progress_updates: ProgressBatcher,
+    progress: int,
+    label: str,
+    error_prefix: str,
+    is_revision: bool = False,
+    retryable: bool = False
+):
+    """
+    Run one pipeline step with shared progress and error handling.
+
+    Records the step progress (batched) before the body runs. If the body raises, the
+    failure is written to the task immediately, then the job is either retried (when
+    retryable) or the error callback is sent and PipelineStepFailed is raised.
+    """
+    await progress_updates.update(progress, label)
+    try:
+        yield
+    except (Retry, PipelineStepFailed):
+        raise
+    except Exception as e:
+        error_msg = f"{error_prefix}: {e}"
+        logger.error(f"PIPELINE: {error_msg}")
+        logger.exception("Full traceback:")
+        await progress_updates.update(progress, error_msg)
+        await progress_updates.flush()
+        await report_pipeline_failure(ctx, extracted_data, error_msg, is_revision=is_revision, retryable=retryable)
+        raise PipelineStepFailed(error_msg) from e
+
+
+def parse_job_payload(model: Type[BaseModel], extracted_data_dict: Dict[str, Any]) -> Optional[BaseModel]:
+    """Parse a job payload into its model, or return None if it is invalid"""
+    try:
+        return model.model_validate(extracted_data_dict)
+    except ValidationError as e:
+        logger.error(f"PIPELINE: Invalid {model.__name__} job payload: {e}")
+        return None
+
+
+def invalid_payload_result(extracted_data_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Job result for a payload that failed validation (no callback can be addressed)"""
+    return {
+        "status": "failed",
+        "error": "Invalid job payload",
+        "video_id": extracted_data_dict.get("video_id")
+    }
+
+
+async def gather_scene_assets(scene_coroutines: List[Awaitable[Any]], empty_result: Any = "") -> List[Any]:
+    """Run per-scene asset generation concurrently, keeping results in scene order"""
+    results = await asyncio.gather(*scene_coroutines, return_exceptions=True)
+
+    asset_urls = []
+    for i, result in enumerate(results, 1):
+        if isinstance(result, Exception):
+            logger.error(f"PIPELINE: Scene {i} asset generation failed: {result}")
+            asset_urls.append(empty_result)
+        else:
+            asset_urls.append(result or empty_result)
+    return asset_urls
+
+
+async def generate_with_scene_retry(generate: Callable[[], Awaitable[str]], description: str) -> str:
+    """
+    Generate one scene asset, regenerating just that asset if it comes back empty.
+
+    Transient HTTP errors are already retried per request; this covers requests that
+    completed without a usable asset, so one bad scene doesn't cost the other scenes' work.
+    """
+    for attempt in range(SCENE_ASSET_RETRIES + 1):
+        asset_url = await generate()
+        if asset_url:
+            return asset_url
+        if attempt < SCENE_ASSET_RETRIES:
+            logger.warning(f"PIPELINE: {description} came back empty, regenerating it...")
+            await asyncio.sleep(2 ** attempt)
+    return ""
+
+
+async def gather_or_raise_first(coroutines: List[Awaitable[Any]]) -> List[Any]:
+    """Run coroutines concurrently, let all of them finish, then re-raise the first failure"""
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return results
+
+
+async def call_openai(ctx: Dict[str, Any], generate: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+    """Run an OpenAI-backed generation with the worker's shared client, within its concurrency cap"""
+    openai_client = ctx.get("openai_client")
+    if not openai_client:
+        raise Exception("OpenAI client not configured - missing OPENAI_API_KEY")
+    async with ctx["openai_slots"]:
+        return await generate(*args, openai_client, **kwargs)
+
+
+async def generate_scenes(ctx: Dict[str, Any], prompt: str, priority: str) -> List[Dict[str, Any]]:
+    """Generate scenes; batch-priority jobs only hold an OpenAI slot per request, not while the batch runs"""
+    if priority != "batch":
+        return await call_openai(ctx, generate_scenes_with_gpt4, prompt)
+    openai_client = ctx.get("openai_client")
+    if not openai_client:
+        raise Exception("OpenAI client not configured - missing OPENAI_API_KEY")
+    return await generate_scenes_with_gpt4(prompt, openai_client, priority=priority, openai_slots=ctx["openai_slots"])
+
+
+async def generate_scene_video(image_url: str, visual_description: str) -> str:
+    """Generate a 512P scene video, skipping scenes whose image failed"""
+    if not image_url:
+        return ""
+    return await generate_single_video_with_fal(image_url, visual_description, resolution="512P")
 
 
 async def process_video_request(ctx: Dict[str, Any], extracted_data_dict: Dict[str, Any]) -> Dict[str, Any]:
     """Process a video generation request through the complete pipeline"""
+    logger.info("PIPELINE: Starting video processing pipeline...")
+    
+    # Validate the payload once, up front, so the error handling below always has a model
+    extracted_data = parse_job_payload(ExtractedData, extracted_data_dict)
+    if extracted_data is None:
+        return invalid_payload_result(extracted_data_dict)
+    
+    # fal.ai requests of this job, including the tasks it starts, bill to the payload's account
+    fal_account.set(extracted_data.fal_account)
+    
+    base_image_task: Optional[asyncio.Task] = None
     try:
-        logger.info("PIPELINE: Starting video processing pipeline...")
-        
-        # Convert dict back to ExtractedData model
-        extracted_data = ExtractedData(**extracted_data_dict)
+        task_id = extracted_data.task_id
+        progress_updates = ProgressBatcher(task_id)
         logger.info(f"PIPELINE: Processing video: {extracted_data.video_id}")
         logger.info(f"PIPELINE: User: {extracted_data.user_email}")
+        logger.info(f"PIPELINE: Attempt {ctx.get('job_try', 1)} of {WorkerSettings.max_tries}")
+        
+        def step(progress: int, label: str, error_prefix: str):
+            return pipeline_step(ctx, extracted_data, progress_updates, progress, label, error_prefix, retryable=True)
         
         # Update task progress
-        await update_task_progress(extracted_data.task_id, 5, "Starting video processing pipeline")
+        await progress_updates.update(5, "Starting video processing pipeline")
+        
+        # Every scene image is edited from the same product image; copying it to fal.ai only
+        # needs the request, so it runs while GPT-4 writes the scenes
+        base_image_task = asyncio.create_task(get_or_stage_base_image(extracted_data.image_url))
         
         # Step 1: Generate scenes using GPT-4
         logger.info("PIPELINE: Step 1 - Generating scenes with GPT-4...")
-        await update_task_progress(extracted_data.task_id, 10, "Generating scenes with GPT-4")
-        
-        if not openai_client:
-            error_msg = "OpenAI client not configured - missing OPENAI_API_KEY"
-            logger.error(f"PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        scenes = await generate_scenes_with_gpt4(extracted_data.prompt, openai_client)
-        if not scenes:
-            error_msg = "Failed to generate scenes with GPT-4 - no scenes returned"
-            logger.error(f"PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
+        async with step(10, "Generating scenes with GPT-4", "Failed to generate scenes with GPT-4"):
+            scenes = await run_cached_step(
+                task_id, "scenes",
+                lambda: generate_scenes(ctx, extracted_data.prompt, extracted_data.priority)
+            )
+            if not scenes:
+                raise Exception("no scenes returned")
         
         logger.info(f"PIPELINE: Generated {len(scenes)} scenes successfully")
         
-        # Step 2: Store scenes in database
+        # Step 2: Store scenes in database. Asset generation only needs the scene content, so the
+        # insert runs in the background and is awaited before the scene URL update
         logger.info("PIPELINE: Step 2 - Storing scenes in database...")
-        await update_task_progress(extracted_data.task_id, 15, "Storing scenes in database")
-        
-        scenes_stored = await store_scenes_in_supabase(scenes, extracted_data.video_id, extracted_data.user_id)
-        if not scenes_stored:
-            error_msg = "Failed to store scenes in database"
-            logger.error(f"PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        # Step 3: Generate scene images (using original image with aspect ratio)
-        logger.info("PIPELINE: Step 3 - Generating scene images...")
-        await update_task_progress(extracted_data.task_id, 25, "Generating scene images")
-        
-        # Extract image prompts from scenes
-        image_prompts = [scene.get("image_prompt", "") for scene in scenes]
-        scene_image_urls = await generate_scene_images_with_fal(image_prompts, extracted_data.image_url, extracted_data.aspect_ratio)
-        
-        # Check if we got the right number of results AND if enough scenes succeeded
-        successful_images = len([url for url in scene_image_urls if url]) if scene_image_urls else 0
-        if not scene_image_urls or len(scene_image_urls) != 5 or successful_images < 3:
-            error_msg = f"Failed to generate scene images - got {len(scene_image_urls) if scene_image_urls else 0} total, {successful_images} successful (need at least 3 out of 5)"
-            logger.error(f"PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        # Update database with scene image URLs
-        await update_scenes_with_image_urls(scene_image_urls, extracted_data.video_id, extracted_data.user_id)
-        
-        # Step 4: Generate voiceovers
-        logger.info("PIPELINE: Step 4 - Generating voiceovers...")
-        await update_task_progress(extracted_data.task_id, 35, "Generating voiceovers")
-        
-        # Extract voiceover prompts from scenes
-        voiceover_prompts = [scene.get("vioce_over", "") for scene in scenes]
-        voiceover_urls = await generate_voiceovers_with_fal(voiceover_prompts)
-        
-        if voiceover_urls:
-            await update_scenes_with_voiceover_urls(voiceover_urls, extracted_data.video_id, extracted_data.user_id)
-        
-        # Step 5: Generate videos from scene images
-        logger.info("PIPELINE: Step 5 - Generating videos from scene images...")
-        await update_task_progress(extracted_data.task_id, 50, "Generating scene videos")
-        
-        # Extract visual descriptions from scenes
-        video_prompts = [scene.get("visual_description", "") for scene in scenes]
-        video_urls = await generate_videos_with_fal(scene_image_urls, video_prompts)
-        
-        # Check if we got the right number of results AND if enough scenes succeeded
-        successful_videos = len([url for url in video_urls if url]) if video_urls else 0
-        if not video_urls or len(video_urls) != 5 or successful_videos < 3:
-            error_msg = f"Failed to generate scene videos - got {len(video_urls) if video_urls else 0} total, {successful_videos} successful (need at least 3 out of 5)"
-            logger.error(f"PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        # Update database with scene video URLs
-        await update_scenes_with_video_urls(video_urls, extracted_data.video_id, extracted_data.user_id)
-        
-        # Step 6: Generate background music
-        logger.info("PIPELINE: Step 6 - Generating background music...")
-        await update_task_progress(extracted_data.task_id, 65, "Generating background music")
-        
-        # Extract music prompts from scenes
-        music_prompts = [scene.get("music_direction", "") for scene in scenes]
-        raw_music_url = await generate_background_music_with_fal(music_prompts)
+        scenes_stored_task = asyncio.create_task(run_cached_step(
+            task_id, "scenes_stored",
+            lambda: store_scenes_in_supabase(scenes, extracted_data.video_id, extracted_data.user_id)
+        ))
+        
+        async def wait_for_stored_scenes() -> None:
+            if not await scenes_stored_task:
+                raise Exception("scenes could not be stored in database")
+        
+        # Steps 3-6 only depend on the scene content: scene visuals (images, then videos),
+        # voiceovers and background music run concurrently
+        async def generate_scene_visuals() -> tuple:
+            # Steps 3 and 5: each scene's video is submitted as soon as its own image is ready
+            logger.info("PIPELINE: Steps 3 and 5 - Generating scene images and videos...")
+            
+            base_image_url = await base_image_task
+            
+            async def generate_scene_visual(scene: Dict[str, Any], i: int) -> List[str]:
+                # Generate scene image (using original image with aspect ratio), then animate it
+                image_url = await generate_with_scene_retry(
+                    lambda: generate_single_scene_image_with_fal(
+                        scene.get("image_prompt", ""), base_image_url, extracted_data.aspect_ratio
+                    ),
+                    f"Scene {i} image"
+                )
+                if not image_url:
+                    return ["", ""]
+                video_url = await generate_with_scene_retry(
+                    lambda: generate_scene_video(image_url, scene.get("visual_description", "")),
+                    f"Scene {i} video"
+                )
+                return [image_url, video_url]
+            
+            # Scenes are memoized individually so a retry only regenerates the failed ones
+            scene_visuals = await gather_scene_assets(
+                [
+                    run_cached_step(
+                        task_id, f"scene_{i}_visuals",
+                        lambda scene=scene, i=i: generate_scene_visual(scene, i),
+                        cache_if=all
+                    )
+                    for i, scene in enumerate(scenes, 1)
+                ],
+                empty_result=["", ""]
+            )
+            # Split the per-scene [image_url, video_url] pairs into parallel lists in one pass
+            scene_image_urls, video_urls = map(list, zip(*scene_visuals))
+            
+            # Check if we got the right number of results AND if enough scenes succeeded
+            successful_images = sum(1 for url in scene_image_urls if url)
+            if len(scene_image_urls) != 5 or successful_images < 3:
+                raise Exception(f"Failed to generate scene images - got {len(scene_image_urls)} total, {successful_images} successful (need at least 3 out of 5)")
+            
+            # Check if we got the right number of results AND if enough scenes succeeded
+            successful_videos = sum(1 for url in video_urls if url)
+            if len(video_urls) != 5 or successful_videos < 3:
+                raise Exception(f"Failed to generate scene videos - got {len(video_urls)} total, {successful_videos} successful (need at least 3 out of 5)")
+            
+            # Compose the scene videos (without audio) right away, while the voiceovers
+            # and music may still be generating
+            from .services.video_generation import compose_final_video
+            composed_video_url = await run_cached_step(
+                task_id, "composed_video_url",
+                lambda: compose_final_video(video_urls)
+            )
+            if not composed_video_url:
+                raise Exception("scene videos could not be composed")
+            return composed_video_url, scene_image_urls, video_urls
         
-        normalized_music_url = ""
-        if raw_music_url:
-            # Normalize music volume
-            logger.info("PIPELINE: Normalizing background music volume...")
-            normalized_music_url = await normalize_music_volume(raw_music_url, offset=-15.0)
+        async def generate_scene_voiceovers() -> list:
+            # Step 4: Generate voiceovers
+            logger.info("PIPELINE: Step 4 - Generating voiceovers...")
             
-            # Store music in database
-            await store_music_in_database(normalized_music_url, extracted_data.video_id, extracted_data.user_id)
+            # Read each voiceover prompt straight from its scene
+            return await gather_scene_assets([
+                run_cached_step(
+                    task_id, f"scene_{i}_voiceover",
+                    lambda prompt=scene.get("vioce_over", ""), i=i: generate_with_scene_retry(
+                        lambda: generate_single_voiceover_with_fal(prompt), f"Scene {i} voiceover"
+                    )
+                )
+                for i, scene in enumerate(scenes, 1)
+            ])
         
-        # Step 7: Compose final video with audio
-        logger.info("PIPELINE: Step 7 - Composing final video with all audio tracks...")
-        await update_task_progress(extracted_data.task_id, 80, "Composing final video with audio")
-        
-        # First compose videos without audio
-        from .services.video_generation import compose_final_video
-        composed_video_url = await compose_final_video(video_urls)
-        
-        if not composed_video_url:
-            error_msg = "Failed to compose final video from scene videos"
-            logger.error(f"PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        # Then add all audio tracks
-        final_video_url = await compose_final_video_with_audio(
-            composed_video_url,
-            voiceover_urls,
-            normalized_music_url,
-            extracted_data.aspect_ratio
-        )
+        async def generate_normalized_music() -> str:
+            # Step 6: Generate background music
+            logger.info("PIPELINE: Step 6 - Generating background music...")
+            
+            async def generate_and_normalize() -> str:
+                # Extract music prompts from scenes
+                music_prompts = [scene.get("music_direction", "") for scene in scenes]
+                raw_music_url = await generate_background_music_with_fal(music_prompts)
+                if not raw_music_url:
+                    return ""
+                
+                # Normalize music volume
+                logger.info("PIPELINE: Normalizing background music volume...")
+                return await normalize_music_volume(raw_music_url, offset=-15.0)
+            
+            normalized_music_url = await run_cached_step(task_id, "normalized_music_url", generate_and_normalize)
+            
+            if normalized_music_url:
+                # Store music in database
+                await store_music_in_database(normalized_music_url, extracted_data.video_id, extracted_data.user_id)
+            return normalized_music_url
+        
+        logger.info("PIPELINE: Steps 3-6 - Generating scene visuals, voiceovers and music concurrently...")
+        async with step(25, "Generating scene images, voiceovers and music", "Failed to generate scene assets"):
+            completed_stages = 0
+            
+            async def report_when_done(stage: Awaitable[Any], label: str) -> Any:
+                nonlocal completed_stages
+                result = await stage
+                # Stages finish in any order, so progress follows how many are done, not which
+                completed_stages += 1
+                await progress_updates.update(25 + 15 * completed_stages, label)
+                return result
+            
+            # Cancel the sibling stages as soon as one of them fails
+            stage_tasks = [
+                asyncio.create_task(report_when_done(generate_scene_visuals(), "Scene videos composed")),
+                asyncio.create_task(report_when_done(generate_scene_voiceovers(), "Voiceovers generated")),
+                asyncio.create_task(report_when_done(generate_normalized_music(), "Background music generated"))
+            ]
+            try:
+                scene_visuals, voiceover_urls, normalized_music_url = await asyncio.gather(*stage_tasks)
+                await wait_for_stored_scenes()
+            except BaseException:
+                for stage_task in stage_tasks + [scenes_stored_task]:
+                    stage_task.cancel()
+                raise
+            composed_video_url, scene_image_urls, video_urls = scene_visuals
+            
+            # Update database with the image, video and voiceover URLs of all scenes at once
+            scene_asset_urls = {"image_url": scene_image_urls, "scene_clip_url": video_urls}
+            if voiceover_urls and len(voiceover_urls) == len(video_urls):
+                scene_asset_urls["voiceover_url"] = voiceover_urls
+            await update_scenes_with_asset_urls(scene_asset_urls, extracted_data.video_id, extracted_data.user_id)
         
-        if not final_video_url:
-            error_msg = "Failed to compose final video with audio tracks"
-            logger.error(f"PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
+        # Step 7: Add all audio tracks to the composed video
+        logger.info("PIPELINE: Step 7 - Composing final video with all audio tracks...")
+        async with step(80, "Composing final video with audio", "Failed to compose final video"):
+            final_video_url = await run_cached_step(
+                task_id, "final_video_url",
+                lambda: compose_final_video_with_audio(
+                    composed_video_url,
+                    voiceover_urls,
+                    normalized_music_url,
+                    extracted_data.aspect_ratio
+                )
+            )
+            if not final_video_url:
+                raise Exception("audio tracks could not be added")
         
         # Step 8: Add captions to video
         logger.info("PIPELINE: Step 8 - Adding captions to video...")
-        await update_task_progress(extracted_data.task_id, 90, "Adding captions to video")
-        
-        captioned_video_url = await add_captions_to_video(final_video_url, extracted_data.aspect_ratio)
+        async with step(90, "Adding captions to video", "Failed to add captions to video"):
+            captioned_video_url = await run_cached_step(
+                task_id, "captioned_video_url",
+                lambda: add_captions_to_video(final_video_url, extracted_data.aspect_ratio)
+            )
         
         # Step 9: Send callback with final video
         logger.info("PIPELINE: Step 9 - Sending callback with final video...")
-        await update_task_progress(extracted_data.task_id, 95, "Sending callback with final video")
+        await progress_updates.update(95, "Sending callback with final video")
         
         callback_success = await send_video_callback(
             captioned_video_url,
@@ -216,7 +446,8 @@ async def process_video_request(ctx: Dict[str, Any], extracted_data_dict: Dict[s
         
         if callback_success:
             logger.info("PIPELINE: Video processing completed successfully!")
-            await update_task_progress(extracted_data.task_id, 100, "Video processing completed successfully")
+            await progress_updates.update(100, "Video processing completed successfully")
+            await progress_updates.flush()
             return {
                 "status": "completed",
                 "final_video_url": captioned_video_url,
@@ -229,199 +460,186 @@ async def process_video_request(ctx: Dict[str, Any], extracted_data_dict: Dict[s
                 "final_video_url": captioned_video_url,
                 "video_id": extracted_data.video_id
             }
-        
+
+    except Retry:
+        raise
+    except PipelineStepFailed as e:
+        return {
+            "status": "failed",
+            "error": str(e),
+            "video_id": extracted_data.video_id
+        }
     except Exception as e:
         logger.error(f"PIPELINE: Video processing failed: {e}")
         logger.exception("Full traceback:")
         
-        # Send error callback
-        try:
-            await send_error_callback(
-                str(e),
-                extracted_data.video_id,
-                extracted_data.chat_id,
-                extracted_data.user_id,
-                extracted_data.callback_url,
-                is_revision=False
-            )
-        except Exception as callback_error:
-            logger.error(f"PIPELINE: Failed to send error callback: {callback_error}")
+        await report_pipeline_failure(ctx, extracted_data, str(e), retryable=True)
         
         return {
             "status": "failed",
             "error": str(e),
             "video_id": extracted_data.video_id
         }
+    finally:
+        # Don't leave image staging running after a failed scene generation step
+        if base_image_task and not base_image_task.done():
+            base_image_task.cancel()
 
 
 async def process_wan_request(ctx: Dict[str, Any], extracted_data_dict: Dict[str, Any]) -> Dict[str, Any]:
     """Process a WAN video generation request through the complete pipeline"""
+    logger.info("WAN_PIPELINE: Starting WAN video processing pipeline...")
+    
+    # Validate the payload once, up front, so the error handling below always has a model
+    extracted_data = parse_job_payload(ExtractedWanData, extracted_data_dict)
+    if extracted_data is None:
+        return invalid_payload_result(extracted_data_dict)
+    
+    # fal.ai requests of this job, including the tasks it starts, bill to the payload's account
+    fal_account.set(extracted_data.fal_account)
+    
+    voiceover_task: Optional[asyncio.Task] = None
+    base_image_task: Optional[asyncio.Task] = None
     try:
-        logger.info("WAN_PIPELINE: Starting WAN video processing pipeline...")
-        
-        # Convert dict back to ExtractedWanData model
-        extracted_data = ExtractedWanData(**extracted_data_dict)
+        task_id = extracted_data.task_id
+        progress_updates = ProgressBatcher(task_id)
         logger.info(f"WAN_PIPELINE: Processing WAN video: {extracted_data.video_id}")
         logger.info(f"WAN_PIPELINE: User: {extracted_data.user_email}")
         logger.info(f"WAN_PIPELINE: Model: {extracted_data.model}")
         
+        def step(progress: int, label: str, error_prefix: str):
+            return pipeline_step(ctx, extracted_data, progress_updates, progress, label, error_prefix)
+        
         # Update task progress
-        await update_task_progress(extracted_data.task_id, 5, "Starting WAN video processing pipeline")
+        await progress_updates.update(5, "Starting WAN video processing pipeline")
+        
+        # All six scene images are edited from the same product image; copying it to fal.ai only
+        # needs the request, so it runs while GPT-4 writes the scenes
+        base_image_task = asyncio.create_task(get_or_stage_base_image(extracted_data.image_url))
         
         # Step 1: Generate WAN scenes using GPT-4
         logger.info("WAN_PIPELINE: Step 1 - Generating WAN scenes with GPT-4...")
-        await update_task_progress(extracted_data.task_id, 10, "Generating WAN scenes with GPT-4")
-        
-        if not openai_client:
-            error_msg = "OpenAI client not configured - missing OPENAI_API_KEY"
-            logger.error(f"WAN_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        wan_scenes, music_prompt = await wan_scene_generator(extracted_data.prompt, openai_client)
-        if not wan_scenes:
-            error_msg = "Failed to generate WAN scenes with GPT-4 - no scenes returned"
-            logger.error(f"WAN_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
+        async with step(10, "Generating WAN scenes with GPT-4", "Failed to generate WAN scenes with GPT-4"):
+            wan_scenes, music_prompt = await call_openai(ctx, wan_scene_generator, extracted_data.prompt)
+            if not wan_scenes:
+                raise Exception("no scenes returned")
         
         logger.info(f"WAN_PIPELINE: Generated {len(wan_scenes)} WAN scenes successfully")
         logger.info(f"WAN_PIPELINE: Music prompt extracted: {music_prompt[:50]}...")
         
+        # Split the per-scene image and video prompts into parallel lists in one pass
+        nano_banana_prompts, wan2_5_prompts = map(list, zip(*[
+            (scene.get("nano_banana_prompt", ""), scene.get("wan2_5_prompt", "")) for scene in wan_scenes
+        ]))
+        
         # Debug: Log all WAN scenes generated by GPT-4
-        logger.info("WAN_PIPELINE: === GPT-4 Generated WAN Scenes ===")
-        for i, scene in enumerate(wan_scenes, 1):
-            logger.info(f"WAN_PIPELINE: Scene {i}:")
-            logger.info(f"WAN_PIPELINE:   nano_banana_prompt: {scene.get('nano_banana_prompt', '')[:100]}...")
-            logger.info(f"WAN_PIPELINE:   elevenlabs_prompt: {scene.get('elevenlabs_prompt', '')}")
-            logger.info(f"WAN_PIPELINE:   wan2_5_prompt: {scene.get('wan2_5_prompt', '')[:100]}...")
-        logger.info("WAN_PIPELINE: === End of GPT-4 Generated WAN Scenes ===")
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, scene in enumerate(wan_scenes, 1):
+                logger.debug("WAN_PIPELINE: Scene %d prompt lengths: nano_banana=%d, elevenlabs=%d, wan2_5=%d",
+                             i, len(scene.get('nano_banana_prompt') or ''),
+                             len(scene.get('elevenlabs_prompt') or ''), len(scene.get('wan2_5_prompt') or ''))
         
         # Step 2: Store WAN scenes in database
         logger.info("WAN_PIPELINE: Step 2 - Storing WAN scenes in database...")
-        await update_task_progress(extracted_data.task_id, 15, "Storing WAN scenes in database")
-        
-        scenes_stored = await store_wan_scenes_in_supabase(wan_scenes, extracted_data.video_id, extracted_data.user_id)
-        if not scenes_stored:
-            error_msg = "Failed to store WAN scenes in database"
-            logger.error(f"WAN_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
+        async with step(15, "Storing WAN scenes in database", "Failed to store WAN scenes in database"):
+            scenes_stored = await store_wan_scenes_in_supabase(wan_scenes, extracted_data.video_id, extracted_data.user_id)
+            if not scenes_stored:
+                raise Exception("database write failed")
+            
+            # Store WAN music prompt in music table
+            logger.info("WAN_PIPELINE: Storing WAN music prompt in music table...")
+            from .services.database_operations import store_wan_music_prompt_in_supabase
+            await store_wan_music_prompt_in_supabase(music_prompt, extracted_data.video_id, extracted_data.user_id)
         
-        # Store WAN music prompt in music table
-        logger.info("WAN_PIPELINE: Storing WAN music prompt in music table...")
-        from .services.database_operations import store_wan_music_prompt_in_supabase
-        await store_wan_music_prompt_in_supabase(music_prompt, extracted_data.video_id, extracted_data.user_id)
+        # Voiceovers only need the scene text, so they generate in the background during step 3
+        voiceover_task = asyncio.create_task(generate_wan_voiceovers_with_fal(wan_scenes))
         
         # Step 3: Generate WAN scene images (using original image with aspect ratio)
         logger.info("WAN_PIPELINE: Step 3 - Generating WAN scene images...")
-        await update_task_progress(extracted_data.task_id, 25, "Generating WAN scene images")
-        
-        # Extract nano_banana_prompts from WAN scenes
-        nano_banana_prompts = [scene.get("nano_banana_prompt", "") for scene in wan_scenes]
-        scene_image_urls = await generate_wan_scene_images_with_fal(nano_banana_prompts, extracted_data.image_url, extracted_data.aspect_ratio)
-        
-        # Check if we got the right number of results AND if enough scenes succeeded
-        successful_images = len([url for url in scene_image_urls if url]) if scene_image_urls else 0
-        if not scene_image_urls or len(scene_image_urls) != 6 or successful_images < 4:
-            error_msg = f"Failed to generate WAN scene images - got {len(scene_image_urls) if scene_image_urls else 0} total, {successful_images} successful (need at least 4 out of 6)"
-            logger.error(f"WAN_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        # Update database with scene image URLs
-        await update_scenes_with_image_urls(scene_image_urls, extracted_data.video_id, extracted_data.user_id)
+        async with step(25, "Generating WAN scene images", "Failed to generate WAN scene images"):
+            base_image_url = await base_image_task
+            scene_image_urls = await generate_wan_scene_images_with_fal(nano_banana_prompts, base_image_url, extracted_data.aspect_ratio)
+            
+            # Check if we got the right number of results AND if enough scenes succeeded
+            successful_images = sum(1 for url in scene_image_urls if url) if scene_image_urls else 0
+            if not scene_image_urls or len(scene_image_urls) != 6 or successful_images < 4:
+                raise Exception(f"got {len(scene_image_urls) if scene_image_urls else 0} total, {successful_images} successful (need at least 4 out of 6)")
         
         # Step 4: Generate WAN voiceovers
         logger.info("WAN_PIPELINE: Step 4 - Generating WAN voiceovers...")
-        await update_task_progress(extracted_data.task_id, 35, "Generating WAN voiceovers")
-        
-        voiceover_urls = await generate_wan_voiceovers_with_fal(wan_scenes)
-        
-        if voiceover_urls:
-            await update_scenes_with_voiceover_urls(voiceover_urls, extracted_data.video_id, extracted_data.user_id)
+        async with step(35, "Generating WAN voiceovers", "Failed to generate WAN voiceovers"):
+            voiceover_urls = await voiceover_task
         
         # Step 5: Generate WAN videos from scene images
         logger.info("WAN_PIPELINE: Step 5 - Generating WAN videos from scene images...")
-        await update_task_progress(extracted_data.task_id, 50, "Generating WAN scene videos")
-        
-        # Extract wan2_5_prompts from WAN scenes
-        wan2_5_prompts = [scene.get("wan2_5_prompt", "") for scene in wan_scenes]
-        video_urls = await generate_wan_videos_with_fal(scene_image_urls, wan2_5_prompts)
-        
-        # Check if we got the right number of results AND if enough scenes succeeded
-        successful_videos = len([url for url in video_urls if url]) if video_urls else 0
-        if not video_urls or len(video_urls) != 6 or successful_videos < 4:
-            error_msg = f"Failed to generate WAN scene videos - got {len(video_urls) if video_urls else 0} total, {successful_videos} successful (need at least 4 out of 6)"
-            logger.error(f"WAN_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-        
-        # Update database with scene video URLs
-        await update_scenes_with_video_urls(video_urls, extracted_data.video_id, extracted_data.user_id)
+        async with step(50, "Generating WAN scene videos", "Failed to generate WAN scene videos"):
+            video_urls = await generate_wan_videos_with_fal(scene_image_urls, wan2_5_prompts)
+            
+            # Check if we got the right number of results AND if enough scenes succeeded
+            successful_videos = sum(1 for url in video_urls if url) if video_urls else 0
+            if not video_urls or len(video_urls) != 6 or successful_videos < 4:
+                raise Exception(f"got {len(video_urls) if video_urls else 0} total, {successful_videos} successful (need at least 4 out of 6)")
+            
+            # Update database with the image, voiceover and video URLs of all scenes at once
+            scene_asset_urls = {"image_url": scene_image_urls, "scene_clip_url": video_urls}
+            if voiceover_urls and len(voiceover_urls) == len(video_urls):
+                scene_asset_urls["voiceover_url"] = voiceover_urls
+            await update_scenes_with_asset_urls(scene_asset_urls, extracted_data.video_id, extracted_data.user_id)
         
         # Step 6: Generate WAN background music
         logger.info("WAN_PIPELINE: Step 6 - Generating WAN background music...")
-        await update_task_progress(extracted_data.task_id, 65, "Generating WAN background music")
-        
-        from .services.music_generation import generate_wan_background_music_with_fal
-        raw_music_url = await generate_wan_background_music_with_fal(music_prompt)
-        
-        normalized_music_url = ""
-        if raw_music_url:
-            # Normalize music volume
-            logger.info("WAN_PIPELINE: Normalizing WAN background music volume...")
-            normalized_music_url = await normalize_music_volume(raw_music_url, offset=-15.0)
+        async with step(65, "Generating WAN background music", "Failed to generate WAN background music"):
+            from .services.music_generation import generate_wan_background_music_with_fal
+            raw_music_url = await generate_wan_background_music_with_fal(music_prompt)
             
-            # Store music in database
-            await store_music_in_database(normalized_music_url, extracted_data.video_id, extracted_data.user_id)
+            normalized_music_url = ""
+            if raw_music_url:
+                # Normalize music volume
+                logger.info("WAN_PIPELINE: Normalizing WAN background music volume...")
+                normalized_music_url = await normalize_music_volume(raw_music_url, offset=-15.0)
+                
+                # Store music in database
+                await store_music_in_database(normalized_music_url, extracted_data.video_id, extracted_data.user_id)
         
         # Step 7: Compose final WAN video with scene videos and voiceovers
         logger.info("WAN_PIPELINE: Step 7 - Merging scene videos with voiceovers...")
-        await update_task_progress(extracted_data.task_id, 75, "Merging scene videos with voiceovers")
-
-        # For WAN, we compose videos + voiceovers directly (no separate composition step)
-        merged_video_url = await compose_wan_final_video_with_audio(
-            video_urls,
-            voiceover_urls,
-            extracted_data.aspect_ratio
-        )
-
-        if not merged_video_url:
-            error_msg = "Failed to merge scene videos with voiceovers"
-            logger.error(f"WAN_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=False)
-            raise Exception(error_msg)
-
+        async with step(75, "Merging scene videos with voiceovers", "Failed to merge scene videos with voiceovers"):
+            # For WAN, we compose videos + voiceovers directly (no separate composition step)
+            merged_video_url = await compose_wan_final_video_with_audio(
+                video_urls,
+                voiceover_urls,
+                extracted_data.aspect_ratio
+            )
+            if not merged_video_url:
+                raise Exception("composition returned no video")
+        
         # Step 8: Add captions to the merged video
         logger.info("WAN_PIPELINE: Step 8 - Adding captions to merged video...")
-        await update_task_progress(extracted_data.task_id, 85, "Adding captions to merged video")
-
-        captioned_video_url = await add_captions_to_video(merged_video_url, extracted_data.aspect_ratio)
-
+        async with step(85, "Adding captions to merged video", "Failed to add captions to merged video"):
+            captioned_video_url = await add_captions_to_video(merged_video_url, extracted_data.aspect_ratio)
+        
         # Step 9: Add background music to the captioned video
         final_video_url = captioned_video_url
         if normalized_music_url:
             logger.info("WAN_PIPELINE: Step 9 - Adding background music to captioned video...")
-            await update_task_progress(extracted_data.task_id, 90, "Adding background music to captioned video")
-
-            from .services.json2video_composition import compose_final_video_with_music_ffmpeg
-            final_video_with_music = await compose_final_video_with_music_ffmpeg(
-                captioned_video_url,
-                normalized_music_url,
-                extracted_data.aspect_ratio
-            )
-
-            if final_video_with_music:
-                final_video_url = final_video_with_music
-                logger.info("WAN_PIPELINE: Background music added successfully")
-            else:
-                logger.warning("WAN_PIPELINE: Failed to add background music, continuing without it")
-
+            async with step(90, "Adding background music to captioned video", "Failed to add background music"):
+                from .services.json2video_composition import compose_final_video_with_music_ffmpeg
+                final_video_with_music = await compose_final_video_with_music_ffmpeg(
+                    captioned_video_url,
+                    normalized_music_url,
+                    extracted_data.aspect_ratio
+                )
+                
+                if final_video_with_music:
+                    final_video_url = final_video_with_music
+                    logger.info("WAN_PIPELINE: Background music added successfully")
+                else:
+                    logger.warning("WAN_PIPELINE: Failed to add background music, continuing without it")
+        
         # Step 10: Send callback with final WAN video
         logger.info("WAN_PIPELINE: Step 10 - Sending callback with final WAN video...")
-        await update_task_progress(extracted_data.task_id, 95, "Sending callback with final WAN video")
-
+        await progress_updates.update(95, "Sending callback with final WAN video")
+        
         callback_success = await send_video_callback(
             final_video_url,
             extracted_data.video_id,
@@ -430,10 +648,11 @@ async def process_wan_request(ctx: Dict[str, Any], extracted_data_dict: Dict[str
             extracted_data.callback_url,
             is_revision=False
         )
-
+        
         if callback_success:
             logger.info("WAN_PIPELINE: WAN video processing completed successfully!")
-            await update_task_progress(extracted_data.task_id, 100, "WAN video processing completed successfully")
+            await progress_updates.update(100, "WAN video processing completed successfully")
+            await progress_updates.flush()
             return {
                 "status": "completed",
                 "final_video_url": final_video_url,
@@ -448,23 +667,19 @@ async def process_wan_request(ctx: Dict[str, Any], extracted_data_dict: Dict[str
                 "video_id": extracted_data.video_id,
                 "model": "wan"
             }
-        
+
+    except PipelineStepFailed as e:
+        return {
+            "status": "failed",
+            "error": str(e),
+            "video_id": extracted_data.video_id,
+            "model": "wan"
+        }
     except Exception as e:
         logger.error(f"WAN_PIPELINE: WAN video processing failed: {e}")
         logger.exception("Full traceback:")
         
-        # Send error callback
-        try:
-            await send_error_callback(
-                str(e),
-                extracted_data.video_id,
-                extracted_data.chat_id,
-                extracted_data.user_id,
-                extracted_data.callback_url,
-                is_revision=False
-            )
-        except Exception as callback_error:
-            logger.error(f"WAN_PIPELINE: Failed to send error callback: {callback_error}")
+        await report_pipeline_failure(ctx, extracted_data, str(e))
         
         return {
             "status": "failed",
@@ -472,145 +687,145 @@ async def process_wan_request(ctx: Dict[str, Any], extracted_data_dict: Dict[str
             "video_id": extracted_data.video_id,
             "model": "wan"
         }
+    finally:
+        # Don't leave image staging or voiceover generation running after a failed step
+        for background_task in (base_image_task, voiceover_task):
+            if background_task and not background_task.done():
+                background_task.cancel()
 
 
 async def process_video_revision(ctx: Dict[str, Any], extracted_data_dict: Dict[str, Any]) -> Dict[str, Any]:
     """Process a video revision request through the complete pipeline"""
+    logger.info("REVISION_PIPELINE: Starting video revision processing pipeline...")
+    
+    # Validate the payload once, up front, so the error handling below always has a model
+    extracted_data = parse_job_payload(ExtractedRevisionData, extracted_data_dict)
+    if extracted_data is None:
+        return invalid_payload_result(extracted_data_dict)
+    
+    # fal.ai requests of this job, including the tasks it starts, bill to the payload's account
+    fal_account.set(extracted_data.fal_account)
+    
+    music_task: Optional[asyncio.Task] = None
+    voiceover_task: Optional[asyncio.Task] = None
+    compose_task: Optional[asyncio.Task] = None
     try:
-        logger.info("REVISION_PIPELINE: Starting video revision processing pipeline...")
-        
-        # Convert dict back to ExtractedRevisionData model
-        extracted_data = ExtractedRevisionData(**extracted_data_dict)
+        task_id = extracted_data.task_id
+        progress_updates = ProgressBatcher(task_id)
         logger.info(f"REVISION_PIPELINE: Processing revision for video: {extracted_data.video_id}")
         logger.info(f"REVISION_PIPELINE: Parent video: {extracted_data.parent_video_id}")
         logger.info(f"REVISION_PIPELINE: User: {extracted_data.user_email}")
         logger.info(f"REVISION_PIPELINE: Revision request: {extracted_data.revision_request[:100]}...")
         
-        # Update task progress
-        await update_task_progress(extracted_data.task_id, 5, "Starting video revision processing pipeline")
-        
-        # Step 1: Detect workflow type (regular vs WAN)
-        logger.info("REVISION_PIPELINE: Step 1 - Detecting workflow type...")
-        await update_task_progress(extracted_data.task_id, 10, "Detecting workflow type")
-        
-        workflow_type = await detect_video_workflow_type(extracted_data.parent_video_id, extracted_data.user_id)
-        logger.info(f"REVISION_PIPELINE: Detected workflow type: {workflow_type}")
+        def step(progress: int, label: str, error_prefix: str):
+            return pipeline_step(ctx, extracted_data, progress_updates, progress, label, error_prefix, is_revision=True)
         
-        # Step 2: Get original scenes from database
-        logger.info("REVISION_PIPELINE: Step 2 - Retrieving original scenes from database...")
-        await update_task_progress(extracted_data.task_id, 15, "Retrieving original scenes")
+        # Update task progress
+        await progress_updates.update(5, "Starting video revision processing pipeline")
         
-        original_scenes = await get_scenes_for_video(extracted_data.parent_video_id, extracted_data.user_id)
-        if not original_scenes:
-            error_msg = f"No original scenes found for parent video: {extracted_data.parent_video_id}"
-            logger.error(f"REVISION_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=True)
-            raise Exception(error_msg)
+        # Step 1: Get original scenes from database
+        logger.info("REVISION_PIPELINE: Step 1 - Retrieving original scenes from database...")
+        async with step(10, "Retrieving original scenes", "Failed to retrieve original scenes"):
+            original_scenes = await get_scenes_for_video(extracted_data.parent_video_id, extracted_data.user_id)
+            if not original_scenes:
+                raise Exception(f"No original scenes found for parent video: {extracted_data.parent_video_id}")
         
         logger.info(f"REVISION_PIPELINE: Retrieved {len(original_scenes)} original scenes")
         
+        # Step 2: Detect workflow type (regular vs WAN) from the scenes we already have; this is
+        # instant, so it shares step 1's progress update
+        logger.info("REVISION_PIPELINE: Step 2 - Detecting workflow type...")
+        workflow_type = workflow_type_for_scenes(extracted_data.parent_video_id, original_scenes)
+        logger.info(f"REVISION_PIPELINE: Detected workflow type: {workflow_type}")
+        
         # Step 3: Generate revised scenes using AI
         logger.info("REVISION_PIPELINE: Step 3 - Generating revised scenes with AI...")
-        await update_task_progress(extracted_data.task_id, 20, "Generating revised scenes with AI")
-        
-        if not openai_client:
-            error_msg = "OpenAI client not configured - missing OPENAI_API_KEY"
-            logger.error(f"REVISION_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=True)
-            raise Exception(error_msg)
-        
-        if workflow_type == "wan":
-            # Use WAN revision AI
-            result = await generate_revised_wan_scenes_with_gpt4(
-                extracted_data.revision_request, 
-                original_scenes, 
-                openai_client
-            )
-            
-            # Handle both scenes and music generation flag
-            if isinstance(result, tuple) and len(result) == 2:
-                revised_scenes, should_generate_music = result
+        async with step(20, "Generating revised scenes with AI", "Failed to generate revised scenes with AI"):
+            if workflow_type == "wan":
+                # Use WAN revision AI
+                result = await call_openai(
+                    ctx,
+                    generate_revised_wan_scenes_with_gpt4,
+                    extracted_data.revision_request,
+                    original_scenes
+                )
+                
+                # Handle both scenes and music generation flag
+                if isinstance(result, tuple) and len(result) == 2:
+                    revised_scenes, should_generate_music = result
+                else:
+                    revised_scenes = result
+                    should_generate_music = False
+                
+                logger.info(f"REVISION_PIPELINE: WAN revision - should generate music: {should_generate_music}")
             else:
-                revised_scenes = result
+                # Use regular revision AI
+                revised_scenes = await call_openai(
+                    ctx,
+                    generate_revised_scenes_with_gpt4,
+                    extracted_data.revision_request,
+                    original_scenes
+                )
                 should_generate_music = False
-                
-            logger.info(f"REVISION_PIPELINE: WAN revision - should generate music: {should_generate_music}")
-        else:
-            # Use regular revision AI
-            revised_scenes = await generate_revised_scenes_with_gpt4(
-                extracted_data.revision_request, 
-                original_scenes, 
-                openai_client
-            )
-            should_generate_music = False
-        
-        if not revised_scenes:
-            error_msg = "Failed to generate revised scenes with AI"
-            logger.error(f"REVISION_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=True)
-            raise Exception(error_msg)
+            
+            if not revised_scenes:
+                raise Exception("no revised scenes returned")
         
         logger.info(f"REVISION_PIPELINE: Generated {len(revised_scenes)} revised scenes")
         
         # Step 4: Compare scenes to determine what needs regeneration
         logger.info("REVISION_PIPELINE: Step 4 - Comparing scenes for granular regeneration...")
-        await update_task_progress(extracted_data.task_id, 25, "Analyzing changes for granular regeneration")
-        
-        scene_changes = await compare_scenes_for_changes(original_scenes, revised_scenes)
-        if not scene_changes:
-            error_msg = "Failed to compare scenes for changes"
-            logger.error(f"REVISION_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=True)
-            raise Exception(error_msg)
+        async with step(25, "Analyzing changes for granular regeneration", "Failed to compare scenes for changes"):
+            scene_changes = await compare_scenes_for_changes(original_scenes, revised_scenes)
+            if not scene_changes:
+                raise Exception("no comparable scenes")
         
         # Step 5: Update database with revised scene content
         logger.info("REVISION_PIPELINE: Step 5 - Updating database with revised content...")
-        await update_task_progress(extracted_data.task_id, 30, "Updating database with revised content")
-        
-        # First, update the video_id for all scenes and music to the new revision video_id
-        await update_video_id_for_scenes(extracted_data.parent_video_id, extracted_data.video_id, extracted_data.user_id)
-        await update_video_id_for_music(extracted_data.parent_video_id, extracted_data.video_id, extracted_data.user_id)
-        
-        # Then update with revised content
-        await update_scenes_with_revised_content(revised_scenes, extracted_data.video_id, extracted_data.user_id)
+        async with step(30, "Updating database with revised content", "Failed to update database with revised content"):
+            # First, move all scenes and music to the new revision video_id in one transaction
+            migrated = await migrate_video_id(extracted_data.parent_video_id, extracted_data.video_id, extracted_data.user_id)
+            if migrated["scenes_updated"] != len(original_scenes):
+                raise Exception(f"moved {migrated['scenes_updated']} of {len(original_scenes)} scenes to the revision video")
+            
+            # Then update with revised content
+            await update_scenes_with_revised_content(revised_scenes, extracted_data.video_id, extracted_data.user_id)
         
         # Step 6: Regenerate only changed assets
         logger.info("REVISION_PIPELINE: Step 6 - Regenerating changed assets...")
         
-        # Regenerate images for changed scenes
-        images_to_regenerate = [sc for sc in scene_changes if sc["image_needs_regen"]]
-        if images_to_regenerate:
-            logger.info(f"REVISION_PIPELINE: Regenerating {len(images_to_regenerate)} scene images...")
-            await update_task_progress(extracted_data.task_id, 35, f"Regenerating {len(images_to_regenerate)} scene images")
+        # New music (WAN workflow only) depends on nothing regenerated below, so it is
+        # generated in the background while the scene assets are regenerated
+        async def regenerate_music() -> str:
+            # Use default music prompt for missing music
+            default_music_prompt = "Lo-fi hip-hop with a light upbeat rhythm, soft percussion, and a steady background flow. Casual and positive, perfect for maintaining a smooth ad vibe across all scenes, ending gently at the final call-to-action."
             
-            for scene_change in images_to_regenerate:
-                scene_number = scene_change["scene_number"]
-                revised_image_prompt = scene_change["revised_image_prompt"]
-                
-                logger.info(f"REVISION_PIPELINE: Regenerating image for scene {scene_number}...")
-                
-                from .services.single_asset_generation import generate_single_scene_image_with_fal
-                new_image_url = await generate_single_scene_image_with_fal(
-                    revised_image_prompt, 
-                    extracted_data.image_url, 
-                    extracted_data.aspect_ratio
-                )
+            from .services.music_generation import generate_wan_background_music_with_fal
+            raw_music_url = await generate_wan_background_music_with_fal(default_music_prompt)
+            
+            if raw_music_url:
+                # Normalize music volume
+                logger.info("REVISION_PIPELINE: Normalizing new background music volume...")
+                normalized_music_url = await normalize_music_volume(raw_music_url, offset=-15.0)
                 
-                if new_image_url:
-                    # Update the scene_change with the new image URL
-                    scene_change["new_image_url"] = new_image_url
-                    logger.info(f"REVISION_PIPELINE: Scene {scene_number} image regenerated successfully")
-                else:
-                    logger.warning(f"REVISION_PIPELINE: Failed to regenerate image for scene {scene_number}, keeping original")
-                    scene_change["new_image_url"] = scene_change["original_image_url"]
+                # Store music in database
+                await store_music_in_database(normalized_music_url, extracted_data.video_id, extracted_data.user_id)
+                logger.info("REVISION_PIPELINE: New background music generated and stored successfully")
+                return normalized_music_url
+            
+            logger.warning("REVISION_PIPELINE: Failed to generate new background music")
+            return ""
+        
+        if workflow_type == "wan" and should_generate_music:
+            logger.info("REVISION_PIPELINE: Generating new background music for WAN revision in the background...")
+            music_task = asyncio.create_task(regenerate_music())
         
         # Regenerate voiceovers for changed scenes
         voiceovers_to_regenerate = [sc for sc in scene_changes if sc["voiceover_needs_regen"]]
         if voiceovers_to_regenerate:
             logger.info(f"REVISION_PIPELINE: Regenerating {len(voiceovers_to_regenerate)} voiceovers...")
-            await update_task_progress(extracted_data.task_id, 45, f"Regenerating {len(voiceovers_to_regenerate)} voiceovers")
             
-            for scene_change in voiceovers_to_regenerate:
+            async def regenerate_voiceover(scene_change: Dict[str, Any]) -> None:
                 scene_number = scene_change["scene_number"]
                 
                 if workflow_type == "wan":
@@ -632,7 +847,6 @@ async def process_video_revision(ctx: Dict[str, Any], extracted_data_dict: Dict[
                     
                     logger.info(f"REVISION_PIPELINE: Regenerating voiceover for scene {scene_number}...")
                     
-                    from .services.single_asset_generation import generate_single_voiceover_with_fal
                     new_voiceover_url = await generate_single_voiceover_with_fal(revised_voiceover_prompt)
                 
                 if new_voiceover_url:
@@ -642,135 +856,171 @@ async def process_video_revision(ctx: Dict[str, Any], extracted_data_dict: Dict[
                 else:
                     logger.warning(f"REVISION_PIPELINE: Failed to regenerate voiceover for scene {scene_number}, keeping original")
                     scene_change["new_voiceover_url"] = scene_change["original_voiceover_url"]
-        
-        # Regenerate videos for changed scenes
-        videos_to_regenerate = [sc for sc in scene_changes if sc["video_needs_regen"]]
-        if videos_to_regenerate:
-            logger.info(f"REVISION_PIPELINE: Regenerating {len(videos_to_regenerate)} scene videos...")
-            await update_task_progress(extracted_data.task_id, 55, f"Regenerating {len(videos_to_regenerate)} scene videos")
             
-            for scene_change in videos_to_regenerate:
+            # Scenes are independent, so all TTS requests run concurrently, and they don't depend
+            # on the visuals either, so they run in the background during the visual step
+            voiceover_task = asyncio.create_task(gather_or_raise_first(
+                [regenerate_voiceover(scene_change) for scene_change in voiceovers_to_regenerate]
+            ))
+        
+        # Regenerate visuals for changed scenes: a changed image always means a changed video,
+        # so each scene runs its own image -> video chain and scenes run concurrently
+        visuals_to_regenerate = [sc for sc in scene_changes if sc["video_needs_regen"]]
+        if visuals_to_regenerate:
+            logger.info(f"REVISION_PIPELINE: Regenerating visuals of {len(visuals_to_regenerate)} scenes...")
+            fal_slots = asyncio.Semaphore(settings.fal_concurrency)
+            
+            # Changed images are all edited from the same product image, so copy it to fal.ai once
+            staged_image_url = None
+            if any(sc["image_needs_regen"] for sc in visuals_to_regenerate):
+                staged_image_url = await get_or_stage_base_image(extracted_data.image_url)
+            
+            async def regenerate_visual(scene_change: Dict[str, Any]) -> None:
                 scene_number = scene_change["scene_number"]
-                revised_video_prompt = scene_change["revised_video_prompt"]
-                
-                # Use the new image URL if it was regenerated, otherwise use original
-                image_url = scene_change.get("new_image_url", scene_change["original_image_url"])
-                
-                logger.info(f"REVISION_PIPELINE: Regenerating video for scene {scene_number}...")
-                
-                from .services.single_asset_generation import generate_single_video_with_fal
-                new_video_url = await generate_single_video_with_fal(image_url, revised_video_prompt)
                 
-                if new_video_url:
-                    # Update the scene_change with the new video URL
-                    scene_change["new_video_url"] = new_video_url
-                    logger.info(f"REVISION_PIPELINE: Scene {scene_number} video regenerated successfully")
-                else:
-                    logger.warning(f"REVISION_PIPELINE: Failed to regenerate video for scene {scene_number}, keeping original")
-                    scene_change["new_video_url"] = scene_change["original_video_url"]
-        
-        # Step 7: Update database with new asset URLs
-        logger.info("REVISION_PIPELINE: Step 7 - Updating database with new asset URLs...")
-        await update_task_progress(extracted_data.task_id, 65, "Updating database with new asset URLs")
-        
-        # Collect all final URLs (new or original)
-        final_image_urls = []
-        final_voiceover_urls = []
-        final_video_urls = []
+                async with fal_slots:
+                    if scene_change["image_needs_regen"]:
+                        logger.info(f"REVISION_PIPELINE: Regenerating image for scene {scene_number}...")
+                        
+                        new_image_url = await get_or_generate_scene_image(
+                            scene_change["revised_image_prompt"],
+                            extracted_data.image_url,
+                            extracted_data.aspect_ratio,
+                            staged_image_url=staged_image_url
+                        )
+                        
+                        if new_image_url:
+                            # Update the scene_change with the new image URL
+                            scene_change["new_image_url"] = new_image_url
+                            logger.info(f"REVISION_PIPELINE: Scene {scene_number} image regenerated successfully")
+                        else:
+                            logger.warning(f"REVISION_PIPELINE: Failed to regenerate image for scene {scene_number}, keeping original")
+                            scene_change["new_image_url"] = scene_change["original_image_url"]
+                    
+                    # Use the new image URL if it was regenerated, otherwise use original
+                    image_url = scene_change.get("new_image_url", scene_change["original_image_url"])
+                    
+                    logger.info(f"REVISION_PIPELINE: Regenerating video for scene {scene_number}...")
+                    
+                    new_video_url = await generate_single_video_with_fal(image_url, scene_change["revised_video_prompt"])
+                    
+                    if new_video_url:
+                        # Update the scene_change with the new video URL
+                        scene_change["new_video_url"] = new_video_url
+                        logger.info(f"REVISION_PIPELINE: Scene {scene_number} video regenerated successfully")
+                    else:
+                        logger.warning(f"REVISION_PIPELINE: Failed to regenerate video for scene {scene_number}, keeping original")
+                        scene_change["new_video_url"] = scene_change["original_video_url"]
+            
+            async with step(35, f"Regenerating visuals of {len(visuals_to_regenerate)} scenes", "Failed to regenerate scene visuals"):
+                await gather_or_raise_first(
+                    [regenerate_visual(scene_change) for scene_change in visuals_to_regenerate]
+                )
         
-        for scene_change in scene_changes:
-            final_image_urls.append(scene_change.get("new_image_url", scene_change["original_image_url"]))
-            final_voiceover_urls.append(scene_change.get("new_voiceover_url", scene_change["original_voiceover_url"]))
-            final_video_urls.append(scene_change.get("new_video_url", scene_change["original_video_url"]))
+        if voiceover_task:
+            async with step(55, f"Regenerating {len(voiceovers_to_regenerate)} voiceovers", "Failed to regenerate voiceovers"):
+                await voiceover_task
         
-        # Update database with final URLs
-        await update_scenes_with_image_urls(final_image_urls, extracted_data.video_id, extracted_data.user_id)
-        await update_scenes_with_voiceover_urls(final_voiceover_urls, extracted_data.video_id, extracted_data.user_id)
-        await update_scenes_with_video_urls(final_video_urls, extracted_data.video_id, extracted_data.user_id)
+        async def compose_scene_videos(video_urls: List[str], voiceover_urls: List[str]) -> str:
+            if workflow_type == "wan":
+                # WAN composition merges each scene with its voiceover; music is added later
+                return await compose_wan_final_video_with_audio(video_urls, voiceover_urls, extracted_data.aspect_ratio)
+            
+            # Regular composition concatenates the scene videos; audio tracks are added later
+            from .services.video_generation import compose_final_video
+            return await compose_final_video(video_urls)
         
-        # Step 8: Generate new music if needed (WAN workflow only)
-        if workflow_type == "wan" and should_generate_music:
-            logger.info("REVISION_PIPELINE: Step 8 - Generating new background music for WAN revision...")
-            await update_task_progress(extracted_data.task_id, 70, "Generating new background music")
+        # Step 7: Update database with new asset URLs
+        logger.info("REVISION_PIPELINE: Step 7 - Updating database with new asset URLs...")
+        async with step(65, "Updating database with new asset URLs", "Failed to update database with new asset URLs"):
+            # In one pass, collect the final URLs (new or original) and the regenerated ones to write
+            final_voiceover_urls = []
+            final_video_urls = []
+            asset_url_updates = []
             
-            # Use default music prompt for missing music
-            default_music_prompt = "Lo-fi hip-hop with a light upbeat rhythm, soft percussion, and a steady background flow. Casual and positive, perfect for maintaining a smooth ad vibe across all scenes, ending gently at the final call-to-action."
+            for scene_change in scene_changes:
+                final_voiceover_urls.append(scene_change.get("new_voiceover_url", scene_change["original_voiceover_url"]))
+                final_video_urls.append(scene_change.get("new_video_url", scene_change["original_video_url"]))
+                
+                scene_update = {"scene_number": scene_change["scene_number"]}
+                for new_key, original_key, column in (
+                    ("new_image_url", "original_image_url", "image_url"),
+                    ("new_voiceover_url", "original_voiceover_url", "voiceover_url"),
+                    ("new_video_url", "original_video_url", "scene_clip_url")
+                ):
+                    new_url = scene_change.get(new_key)
+                    if new_url and new_url != scene_change[original_key]:
+                        scene_update[column] = new_url
+                if len(scene_update) > 1:
+                    asset_url_updates.append(scene_update)
             
-            from .services.music_generation import generate_wan_background_music_with_fal
-            raw_music_url = await generate_wan_background_music_with_fal(default_music_prompt)
+            # Composition needs neither the database nor the music, so it starts now and runs
+            # while the URLs are written and the music is prepared
+            compose_task = asyncio.create_task(compose_scene_videos(final_video_urls, final_voiceover_urls))
             
-            if raw_music_url:
-                # Normalize music volume
-                logger.info("REVISION_PIPELINE: Normalizing new background music volume...")
-                normalized_music_url = await normalize_music_volume(raw_music_url, offset=-15.0)
-                
-                # Store music in database
-                await store_music_in_database(normalized_music_url, extracted_data.video_id, extracted_data.user_id)
-                logger.info("REVISION_PIPELINE: New background music generated and stored successfully")
-            else:
-                logger.warning("REVISION_PIPELINE: Failed to generate new background music")
+            # Write only the regenerated URLs, in a single round-trip
+            if asset_url_updates:
+                await update_scene_asset_urls(asset_url_updates, extracted_data.video_id, extracted_data.user_id)
+        
+        # Step 8: Wait for the new music if needed (WAN workflow only)
+        normalized_music_url = ""
+        if music_task:
+            logger.info("REVISION_PIPELINE: Step 8 - Waiting for new background music for WAN revision...")
+            async with step(70, "Generating new background music", "Failed to generate new background music"):
+                normalized_music_url = await music_task
         
-        # Step 9: Get existing music for composition
-        logger.info("REVISION_PIPELINE: Step 9 - Retrieving music for composition...")
-        music_record = await get_music_for_video(extracted_data.video_id, extracted_data.user_id)
-        normalized_music_url = music_record.get("music_url", "") if music_record else ""
+        # Step 9: Get existing music for composition, unless we just generated it
+        if not normalized_music_url:
+            logger.info("REVISION_PIPELINE: Step 9 - Retrieving music for composition...")
+            music_record = await get_music_for_video(extracted_data.video_id, extracted_data.user_id)
+            normalized_music_url = music_record.get("music_url", "") if music_record else ""
         
         # Step 10: Compose final revision video
         logger.info("REVISION_PIPELINE: Step 10 - Composing final revision video...")
-        await update_task_progress(extracted_data.task_id, 75, "Composing final revision video")
-        
-        if workflow_type == "wan":
-            # WAN composition
-            final_video_url = await compose_wan_final_video_with_audio(
-                final_video_urls,
-                final_voiceover_urls,
-                extracted_data.aspect_ratio
-            )
-            
-            # Add background music if available
-            if normalized_music_url and final_video_url:
-                logger.info("REVISION_PIPELINE: Adding background music to WAN revision video...")
+        async with step(75, "Composing final revision video", "Failed to compose final revision video"):
+            if workflow_type == "wan":
+                # WAN composition
+                final_video_url = await compose_task
                 
-                from .services.json2video_composition import compose_final_video_with_music_ffmpeg
-                final_video_with_music = await compose_final_video_with_music_ffmpeg(
-                    final_video_url,
-                    normalized_music_url,
-                    extracted_data.aspect_ratio
-                )
+                # Add background music if available
+                if normalized_music_url and final_video_url:
+                    logger.info("REVISION_PIPELINE: Adding background music to WAN revision video...")
+                    
+                    from .services.json2video_composition import compose_final_video_with_music_ffmpeg
+                    final_video_with_music = await compose_final_video_with_music_ffmpeg(
+                        final_video_url,
+                        normalized_music_url,
+                        extracted_data.aspect_ratio
+                    )
+                    
+                    if final_video_with_music:
+                        final_video_url = final_video_with_music
+                        logger.info("REVISION_PIPELINE: Background music added to WAN revision successfully")
+            else:
+                # Regular composition
+                composed_video_url = await compose_task
                 
-                if final_video_with_music:
-                    final_video_url = final_video_with_music
-                    logger.info("REVISION_PIPELINE: Background music added to WAN revision successfully")
-        else:
-            # Regular composition
-            from .services.video_generation import compose_final_video
-            composed_video_url = await compose_final_video(final_video_urls)
+                if composed_video_url:
+                    final_video_url = await compose_final_video_with_audio(
+                        composed_video_url,
+                        final_voiceover_urls,
+                        normalized_music_url,
+                        extracted_data.aspect_ratio
+                    )
+                else:
+                    final_video_url = ""
             
-            if composed_video_url:
-                final_video_url = await compose_final_video_with_audio(
-                    composed_video_url,
-                    final_voiceover_urls,
-                    normalized_music_url,
-                    extracted_data.aspect_ratio
-                )
-            else:
-                final_video_url = ""
-        
-        if not final_video_url:
-            error_msg = "Failed to compose final revision video"
-            logger.error(f"REVISION_PIPELINE: {error_msg}")
-            await send_error_callback(error_msg, extracted_data.video_id, extracted_data.chat_id, extracted_data.user_id, is_revision=True)
-            raise Exception(error_msg)
+            if not final_video_url:
+                raise Exception("composition returned no video")
         
         # Step 11: Add captions to revision video
         logger.info("REVISION_PIPELINE: Step 11 - Adding captions to revision video...")
-        await update_task_progress(extracted_data.task_id, 85, "Adding captions to revision video")
-        
-        captioned_video_url = await add_captions_to_video(final_video_url, extracted_data.aspect_ratio)
+        async with step(85, "Adding captions to revision video", "Failed to add captions to revision video"):
+            captioned_video_url = await add_captions_to_video(final_video_url, extracted_data.aspect_ratio)
         
         # Step 12: Send callback with final revision video
         logger.info("REVISION_PIPELINE: Step 12 - Sending callback with final revision video...")
-        await update_task_progress(extracted_data.task_id, 95, "Sending callback with final revision video")
+        await progress_updates.update(95, "Sending callback with final revision video")
         
         callback_success = await send_video_callback(
             captioned_video_url,
@@ -783,7 +1033,8 @@ async def process_video_revision(ctx: Dict[str, Any], extracted_data_dict: Dict[
         
         if callback_success:
             logger.info("REVISION_PIPELINE: Video revision processing completed successfully!")
-            await update_task_progress(extracted_data.task_id, 100, "Video revision processing completed successfully")
+            await progress_updates.update(100, "Video revision processing completed successfully")
+            await progress_updates.flush()
             return {
                 "status": "completed",
                 "final_video_url": captioned_video_url,
@@ -800,23 +1051,19 @@ async def process_video_revision(ctx: Dict[str, Any], extracted_data_dict: Dict[
                 "parent_video_id": extracted_data.parent_video_id,
                 "workflow_type": workflow_type
             }
-        
+
+    except PipelineStepFailed as e:
+        return {
+            "status": "failed",
+            "error": str(e),
+            "video_id": extracted_data.video_id,
+            "parent_video_id": extracted_data.parent_video_id
+        }
     except Exception as e:
         logger.error(f"REVISION_PIPELINE: Video revision processing failed: {e}")
         logger.exception("Full traceback:")
         
-        # Send error callback
-        try:
-            await send_error_callback(
-                str(e),
-                extracted_data.video_id,
-                extracted_data.chat_id,
-                extracted_data.user_id,
-                extracted_data.callback_url,
-                is_revision=True
-            )
-        except Exception as callback_error:
-            logger.error(f"REVISION_PIPELINE: Failed to send error callback: {callback_error}")
+        await report_pipeline_failure(ctx, extracted_data, str(e), is_revision=True)
         
         return {
             "status": "failed",
@@ -824,13 +1071,56 @@ async def process_video_revision(ctx: Dict[str, Any], extracted_data_dict: Dict[
             "video_id": extracted_data.video_id,
             "parent_video_id": extracted_data.parent_video_id
         }
+    finally:
+        # Don't leave background generation or composition running after a failed step
+        for background_task in (music_task, voiceover_task, compose_task):
+            if background_task and not background_task.done():
+                background_task.cancel()
+
+
+async def startup(ctx: Dict[str, Any]) -> None:
+    """Create the OpenAI client shared by all jobs"""
+    logger.info(f"WORKER: Running up to {settings.max_concurrent_tasks} jobs with {settings.max_blocking_threads} DashScope threads")
+    
+    # One client (and connection pool) per process; the semaphore caps concurrent OpenAI
+    # requests across all jobs, the token bucket in rate_limit caps their volume
+    ctx["openai_client"] = AsyncOpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
+    ctx["openai_slots"] = asyncio.Semaphore(settings.openai_concurrency)
+    
+    # fal.ai results are announced by webhook instead of polled when a webhook URL is set
+    if settings.fal_webhook_url:
+        ctx["fal_completion_listener"] = asyncio.create_task(listen_for_fal_completions())
+
+
+async def shutdown(ctx: Dict[str, Any]) -> None:
+    """Close the worker's shared Redis pool and HTTP clients"""
+    logger.info("WORKER: Closing shared connections...")
+    if ctx.get("fal_completion_listener"):
+        ctx["fal_completion_listener"].cancel()
+    await close_task_redis_pool()
+    if _pending_error_callbacks:
+        await asyncio.gather(*_pending_error_callbacks, return_exceptions=True)
+    await close_callback_client()
+    await close_ffmpeg_client()
+    await close_fal_client()
+    await close_supabase_client()
+    if ctx.get("openai_client"):
+        await ctx["openai_client"].close()
+    close_dashscope_executor()
 
 
 # ARQ Worker Settings
 class WorkerSettings:
-    redis_settings = RedisSettings.from_dsn(settings.redis_url)
+    redis_settings = get_redis_settings()
     functions = [process_video_request, process_wan_request, process_video_revision]
+    on_startup = startup
+    on_shutdown = shutdown
     job_timeout = settings.task_timeout
     max_jobs = settings.max_concurrent_tasks
-    max_tries = 3
-    keep_result = 3600  # Keep results for 1 hour
+    poll_delay = settings.queue_poll_delay
+    max_tries = 2  # One retry; completed steps are memoized per task
+    # Results are only kept so ARQ rejects a retried webhook (same task ID) after its job ended,
+    # instead of re-running it on top of the old task state and memoized steps
+    keep_result = 86400
+    job_serializer = serialize_job  # JSON instead of pickle; must match the webhook handler's pool
+    job_deserializer = deserialize_job
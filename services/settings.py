@@ -1,6 +0,0 @@
-from pydantic_settings import BaseSettings
-
-class Settings(BaseSettings):
-    REDIS_URL: str = "redis://localhost:6379/0"
-
-settings = Settings()
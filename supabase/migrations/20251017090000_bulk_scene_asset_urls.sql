@@ -0,0 +1,44 @@
+/*
+  # Add bulk scene asset URL update function
+
+  1. New Functions
+    - `update_scene_asset_urls(p_video_id, p_user_id, p_scenes)`
+      - `p_scenes` is a JSON array of objects with `scene_number` and any of
+        `image_url`, `voiceover_url`, `scene_clip_url`
+      - Updates all listed scenes of a video in a single statement
+      - Columns missing (or null) in an entry keep their current value
+      - Returns the scene numbers of the updated rows
+
+  2. Notes
+    - Replaces one PATCH request per scene and asset type with one RPC call
+    - An UPDATE is used instead of an upsert because the scene rows always exist
+      at this point and their NOT NULL content columns are not part of the payload
+*/
+
+CREATE OR REPLACE FUNCTION update_scene_asset_urls(
+  p_video_id text,
+  p_user_id text,
+  p_scenes jsonb
+)
+RETURNS TABLE (scene_number integer)
+LANGUAGE sql
+AS $$
+  UPDATE scenes AS s
+  SET
+    image_url = COALESCE(u.image_url, s.image_url),
+    voiceover_url = COALESCE(u.voiceover_url, s.voiceover_url),
+    scene_clip_url = COALESCE(u.scene_clip_url, s.scene_clip_url),
+    updated_at = now()
+  FROM jsonb_to_recordset(p_scenes) AS u(
+    scene_number integer,
+    image_url text,
+    voiceover_url text,
+    scene_clip_url text
+  )
+  WHERE s.video_id = p_video_id
+    AND s.user_id = p_user_id
+    AND s.scene_number = u.scene_number
+  RETURNING s.scene_number;
+$$;
+
+GRANT EXECUTE ON FUNCTION update_scene_asset_urls(text, text, jsonb) TO service_role;
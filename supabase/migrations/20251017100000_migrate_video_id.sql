@@ -0,0 +1,43 @@
+/*
+  # Add atomic video_id migration function
+
+  1. New Functions
+    - `migrate_video_id(p_old_video_id, p_new_video_id, p_user_id)`
+      - Moves all scenes and the music record of a video to a new video_id
+      - Both UPDATEs run inside the function call, so they commit together
+      - Both UPDATEs set `updated_at`, as the PATCH requests they replace did
+      - Returns the number of scene rows and music rows moved
+
+  2. Notes
+    - Replaces the two sequential PATCH requests the revision pipeline used to
+      issue, which could leave scenes migrated but music not if the second failed
+*/
+
+CREATE OR REPLACE FUNCTION migrate_video_id(
+  p_old_video_id text,
+  p_new_video_id text,
+  p_user_id text
+)
+RETURNS TABLE (scenes_updated integer, music_updated integer)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE scenes
+  SET video_id = p_new_video_id,
+      updated_at = now()
+  WHERE video_id = p_old_video_id
+    AND user_id = p_user_id;
+  GET DIAGNOSTICS scenes_updated = ROW_COUNT;
+
+  UPDATE music
+  SET video_id = p_new_video_id,
+      updated_at = now()
+  WHERE video_id = p_old_video_id
+    AND user_id = p_user_id;
+  GET DIAGNOSTICS music_updated = ROW_COUNT;
+
+  RETURN NEXT;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION migrate_video_id(text, text, text) TO service_role;
@@ -0,0 +1,20 @@
+/*
+  # Maintain scenes.updated_at in the database
+
+  1. Changes
+    - Enable the `moddatetime` extension
+    - Add a `BEFORE UPDATE` trigger on `scenes` that sets `updated_at` to now()
+
+  2. Notes
+    - `updated_at` already defaults to now() on insert, so the backend no longer
+      needs to send a timestamp with scene updates
+*/
+
+CREATE EXTENSION IF NOT EXISTS moddatetime SCHEMA extensions;
+
+DROP TRIGGER IF EXISTS set_scenes_updated_at ON scenes;
+
+CREATE TRIGGER set_scenes_updated_at
+  BEFORE UPDATE ON scenes
+  FOR EACH ROW
+  EXECUTE FUNCTION extensions.moddatetime(updated_at);